@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+测量 get_srt_by_wisper.py 的冷启动时间（依赖检查完成、开始实际处理之前）
+使用方法: python3 bench_startup.py [-n 次数] [--target 毫秒]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT = Path(__file__).parent / "get_srt_by_wisper.py"
+
+# 完整执行 main()，在进入 extract_audio（第一步实际处理）时立即退出
+MAIN_RUNNER = """
+import os, sys
+sys.path.insert(0, {script_dir!r})
+sys.argv = ['get_srt_by_wisper.py', {video!r}]
+import get_srt_by_wisper
+get_srt_by_wisper.WhisperProcessor.extract_audio = lambda *args: os._exit(0)
+get_srt_by_wisper.main()
+os._exit(1)
+"""
+
+
+def time_command(cmd, runs: int, env=None, check: bool = False) -> list:
+    """多次运行命令，返回每次耗时（毫秒）；check 为真时命令失败即退出"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, env=env)
+        timings.append((time.perf_counter() - start) * 1000)
+        if check and result.returncode != 0:
+            print(f"❌ 命令失败: {result.stderr.decode(errors='replace').strip()[-500:]}")
+            sys.exit(1)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='get_srt_by_wisper.py 冷启动基准测试')
+    parser.add_argument('-n', '--runs', type=int, default=10, help='运行次数 (默认: 10)')
+    parser.add_argument('--target', type=float, default=100.0, help='目标启动时间，毫秒 (默认: 100)')
+    args = parser.parse_args()
+
+    print("🚀 冷启动基准测试")
+    print("=" * 50)
+
+    timings = time_command([sys.executable, str(SCRIPT), '--check-deps'], args.runs)
+    medians = {'--check-deps': statistics.median(timings)}
+    print(f"  --check-deps: 最短 {min(timings):.1f}ms, 中位数 {medians['--check-deps']:.1f}ms ({args.runs} 次)")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        video = Path(temp_dir) / 'bench.mp4'
+        video.write_bytes(b'')
+        env = dict(os.environ)
+        # 缺少的外部命令用空的占位脚本代替，它们不会被执行
+        for tool in ('whisper', 'ffmpeg'):
+            if not shutil.which(tool):
+                stub = Path(temp_dir) / tool
+                stub.write_text('#!/bin/sh\nexit 1\n')
+                stub.chmod(0o755)
+                env['PATH'] = f"{temp_dir}{os.pathsep}{env.get('PATH', '')}"
+        runner = MAIN_RUNNER.format(script_dir=str(SCRIPT.parent), video=str(video))
+        timings = time_command([sys.executable, '-c', runner], args.runs, env, check=True)
+    medians['main() 到 extract_audio'] = statistics.median(timings)
+    print(f"  main() 到 extract_audio: 最短 {min(timings):.1f}ms, "
+          f"中位数 {medians['main() 到 extract_audio']:.1f}ms ({args.runs} 次)")
+
+    # 对比旧的依赖检查方式（每次启动 whisper --help）
+    if shutil.which('whisper'):
+        legacy = time_command(['whisper', '--help'], min(args.runs, 3))
+        print(f"  旧检查 whisper --help: 中位数 {statistics.median(legacy):.1f}ms")
+
+    slow = {name: median for name, median in medians.items() if median > args.target}
+    if not slow:
+        print(f"✅ 达到目标 (<= {args.target:.0f}ms)")
+    else:
+        for name, median in slow.items():
+            print(f"❌ {name} 超出目标 ({median:.1f}ms > {args.target:.0f}ms)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
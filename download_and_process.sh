@@ -164,6 +164,7 @@ fi
 # 检查必要的脚本是否存在
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 GETVIDEO_SCRIPT="$SCRIPT_DIR/getvideo.sh"
+source "$SCRIPT_DIR/utils/media_helper.sh"
 PROCESS_PART1_SCRIPT="$SCRIPT_DIR/process_video_part1.sh"
 TRANSLATE_SCRIPT="$SCRIPT_DIR/translate_by_claude.sh"
 GENMARKDOWN_SCRIPT="$SCRIPT_DIR/genmarkdown_by_claude.sh"
@@ -250,6 +251,8 @@ echo "  5. 生成TTS配音视频"
 echo "=================================================="
 
 # 步骤1: 下载视频或使用本地文件
+DOWNLOADED_AUDIO=""
+SPLIT_STREAM_FILES=()
 echo ""
 if [ "$IS_LOCAL_FILE" = true ]; then
     echo "📥 步骤 1/5: 使用本地视频文件..."
@@ -258,8 +261,8 @@ if [ "$IS_LOCAL_FILE" = true ]; then
 else
     echo "📥 步骤 1/5: 下载视频..."
 
-    # 构建getvideo.sh的参数
-    GETVIDEO_ARGS=()
+    # 构建getvideo.sh的参数（视频流和音频流并行分离下载，音频到达即提取第一阶段所需的WAV）
+    GETVIDEO_ARGS=("-split")
     if [ -n "$OUTPUT_NAME" ]; then
         GETVIDEO_ARGS+=("-o" "$OUTPUT_NAME")
     fi
@@ -306,6 +309,7 @@ else
 
     # 从保存的输出中提取文件名
     DOWNLOADED_FILE=$(grep "^DOWNLOADED_FILE:" "$DOWNLOAD_LOG" | tail -n 1 | sed 's/^DOWNLOADED_FILE://')
+    DOWNLOADED_AUDIO=$(grep "^AUDIO_FILE:" "$DOWNLOAD_LOG" | tail -n 1 | sed 's/^AUDIO_FILE://')
 
     # 如果没有找到标记的文件名，尝试从最后一行提取
     if [ -z "$DOWNLOADED_FILE" ]; then
@@ -335,6 +339,37 @@ else
     fi
 
     echo "✅ 视频下载成功: $DOWNLOADED_FILE"
+
+    # 分离下载得到的是无音频的视频流：无损合并为普通视频文件，后续步骤按原来的文件名查找临时目录
+    if [[ "$DOWNLOADED_FILE" == *_video.* ]] && [ -f "$DOWNLOADED_AUDIO" ]; then
+        VIDEO_EXT="${DOWNLOADED_FILE##*.}"
+        AUDIO_EXT="${DOWNLOADED_AUDIO##*.}"
+        if [ "$VIDEO_EXT" = "webm" ] && [ "$AUDIO_EXT" = "webm" ]; then
+            MERGED_EXT="webm"; MERGED_FORMAT="webm"
+        elif [ "$VIDEO_EXT" = "mp4" ] && [ "$AUDIO_EXT" = "m4a" ]; then
+            MERGED_EXT="mp4"; MERGED_FORMAT="mp4"
+        else
+            MERGED_EXT="mkv"; MERGED_FORMAT="matroska"
+        fi
+        MERGED_FILE="${DOWNLOADED_FILE%_video.*}.${MERGED_EXT}"
+        
+        echo "🔄 合并视频流和音频流: $MERGED_FILE"
+        if ffmpeg -i "$DOWNLOADED_FILE" -i "$DOWNLOADED_AUDIO" -map 0:v:0 -map 1:a:0 -c copy \
+                  -f "$MERGED_FORMAT" "${MERGED_FILE}.part" -y -hide_banner -loglevel warning \
+                && verify_media "${MERGED_FILE}.part"; then
+            mv "${MERGED_FILE}.part" "$MERGED_FILE"
+            echo "✅ 合并完成: $MERGED_FILE"
+            # 分离文件在第一阶段使用音频流之后再删除
+            SPLIT_STREAM_FILES=("$DOWNLOADED_FILE" "$DOWNLOADED_AUDIO")
+            DOWNLOADED_FILE="$MERGED_FILE"
+        else
+            rm -f "${MERGED_FILE}.part"
+            echo "❌ 视频流和音频流合并失败"
+            echo "   视频: $DOWNLOADED_FILE"
+            echo "   音频: $DOWNLOADED_AUDIO"
+            exit 1
+        fi
+    fi
 fi
 
 # 获取生成的文件信息（提前计算用于字幕下载）
@@ -444,6 +479,11 @@ if [ -n "$DOWNLOADED_SUBTITLE_FILE" ]; then
     PART1_ARGS+=("-srt" "$DOWNLOADED_SUBTITLE_FILE")
 fi
 
+# 分离下载的音频流（音频通常已在下载时提取到临时目录，第一阶段会直接使用）
+if [ -f "$DOWNLOADED_AUDIO" ]; then
+    PART1_ARGS+=("-a" "$DOWNLOADED_AUDIO")
+fi
+
 PART1_ARGS+=("$DOWNLOADED_FILE")
 
 # 显示将要执行的命令
@@ -458,6 +498,12 @@ if [ $? -ne 0 ]; then
     exit 1
 fi
 
+# 第一阶段已完成，清理合并前的分离文件
+if [ ${#SPLIT_STREAM_FILES[@]} -gt 0 ]; then
+    echo "🧹 清理分离的临时文件..."
+    rm -f "${SPLIT_STREAM_FILES[@]}"
+fi
+
 # 获取生成的文件信息（已在字幕下载阶段定义）
 OPTIMIZED_SRT="$TEMP_DIR/step3_optimized.srt"
 TRANSLATED_SRT="$TEMP_DIR/step3.5_translated.srt"
@@ -537,8 +583,8 @@ if [[ ! "$DOWNLOADED_FILE" =~ _hd\..*$ ]]; then
     echo "目标HD视频文件: $HD_VIDEO_FILE"
     
     # 检查HD视频是否已经存在
-    if [ -f "$HD_VIDEO_FILE" ] && [ -s "$HD_VIDEO_FILE" ]; then
-        echo "✅ HD视频文件已存在: $HD_VIDEO_FILE"
+    if verify_media "$HD_VIDEO_FILE"; then
+        echo "✅ HD视频文件已存在且校验通过: $HD_VIDEO_FILE"
         VIDEO_FOR_PART2="$HD_VIDEO_FILE"
     else
         # 创建临时文件保存高清下载输出
@@ -547,8 +593,8 @@ if [[ ! "$DOWNLOADED_FILE" =~ _hd\..*$ ]]; then
         # 临时禁用严格模式以捕获下载脚本的退出码
         set +e
         
-        # 构建高清下载参数
-        HD_GETVIDEO_ARGS=("-hd")
+        # 构建高清下载参数（视频流和音频流并行分离下载，支持续传和完整性校验）
+        HD_GETVIDEO_ARGS=("-hd" "-split")
         if [ -n "$OUTPUT_NAME" ]; then
             HD_GETVIDEO_ARGS+=("-o" "$OUTPUT_NAME")
         else
@@ -576,7 +622,10 @@ if [[ ! "$DOWNLOADED_FILE" =~ _hd\..*$ ]]; then
             fi
             
             # 检查HD下载结果并处理视频格式转换
-            HD_AUDIO_FILE=""
+            HD_AUDIO_FILE=$(grep "^AUDIO_FILE:" "$HD_DOWNLOAD_LOG" | tail -n 1 | sed 's/^AUDIO_FILE://')
+            if [ ! -f "$HD_AUDIO_FILE" ] || [ ! -s "$HD_AUDIO_FILE" ]; then
+                HD_AUDIO_FILE=""
+            fi
             
             # 检查是否有分离的视频和音频文件
             if [ -f "$HD_DOWNLOADED_FILE" ] && [ -s "$HD_DOWNLOADED_FILE" ]; then
@@ -588,19 +637,21 @@ if [[ ! "$DOWNLOADED_FILE" =~ _hd\..*$ ]]; then
                     # 分离下载模式：查找对应的音频文件
                     echo "🔍 检测到分离下载的HD视频文件: $HD_DOWNLOADED_FILE"
                     
-                    # 查找对应的音频文件
-                    AUDIO_PATTERNS=(
-                        "${HD_BASE_NAME/_video/_audio}.webm"
-                        "${HD_BASE_NAME/_video/_audio}.m4a"
-                    )
+                    # 查找对应的音频文件（getvideo.sh 未报告时）
+                    if [ -z "$HD_AUDIO_FILE" ]; then
+                        AUDIO_PATTERNS=(
+                            "${HD_BASE_NAME/_video/_audio}.webm"
+                            "${HD_BASE_NAME/_video/_audio}.m4a"
+                        )
                     
-                    for pattern in "${AUDIO_PATTERNS[@]}"; do
-                        if [ -f "$pattern" ] && [ -s "$pattern" ]; then
-                            HD_AUDIO_FILE="$pattern"
-                            echo "✅ 找到对应的音频文件: $HD_AUDIO_FILE"
-                            break
-                        fi
-                    done
+                        for pattern in "${AUDIO_PATTERNS[@]}"; do
+                            if [ -f "$pattern" ] && [ -s "$pattern" ]; then
+                                HD_AUDIO_FILE="$pattern"
+                                echo "✅ 找到对应的音频文件: $HD_AUDIO_FILE"
+                                break
+                            fi
+                        done
+                    fi
                     
                     # 如果直接匹配失败，尝试通配符搜索
                     if [ -z "$HD_AUDIO_FILE" ]; then
@@ -629,7 +680,8 @@ if [[ ! "$DOWNLOADED_FILE" =~ _hd\..*$ ]]; then
                         elif ffmpeg -i "$HD_DOWNLOADED_FILE" -i "$HD_AUDIO_FILE" \
                                  -c:v copy -c:a aac -shortest \
                                  "$HD_VIDEO_FILE" -y \
-                                 -hide_banner -loglevel warning; then
+                                 -hide_banner -loglevel warning \
+                             && verify_media "$HD_VIDEO_FILE"; then
                             echo "✅ HD视频合并成功: $HD_VIDEO_FILE"
                             
                             # 获取文件信息
@@ -673,7 +725,8 @@ if [[ ! "$DOWNLOADED_FILE" =~ _hd\..*$ ]]; then
                         elif ffmpeg -i "$HD_DOWNLOADED_FILE" \
                                  -c:v libx264 -c:a aac -preset fast \
                                  "$HD_VIDEO_FILE" -y \
-                                 -hide_banner -loglevel warning; then
+                                 -hide_banner -loglevel warning \
+                             && verify_media "$HD_VIDEO_FILE"; then
                             echo "✅ HD视频格式转换成功: $HD_VIDEO_FILE"
                             
                             # 获取文件信息
@@ -8,12 +8,15 @@ show_help() {
     echo "用法: $0 [选项] <视频文件名> [原始URL]"
     echo ""
     echo "选项:"
+    echo "  --llm-cmd CMD         指定LLM命令 (默认: claude --model claude-sonnet-4-20250514)"
     echo "  -h, --help            显示帮助信息"
     echo ""
     echo "说明:"
     echo "  本脚本使用 Claude 命令行工具根据字幕生成小红书文案"
     echo "  将 step3.5_translated.srt 转换为小红书风格的标题和文案"
     echo "  输出保存为 xiaohongshu.md"
+    echo "  完整字幕按token预算分片并发摘要，片段摘要缓存在 summary_cache/，"
+    echo "  重新生成时只需执行最后的汇总步骤"
     echo ""
     echo "前置条件:"
     echo "  1. 已安装 Claude 命令行工具"
@@ -28,10 +31,15 @@ show_help() {
 # 初始化变量
 INPUT_VIDEO=""
 SOURCE_URL=""
+LLM_CMD="claude --model claude-sonnet-4-20250514"
 
 # 解析参数
 while [[ $# -gt 0 ]]; do
     case $1 in
+        --llm-cmd)
+            LLM_CMD="$2"
+            shift 2
+            ;;
         -h|--help)
             show_help
             exit 0
@@ -63,8 +71,9 @@ if [ -z "$INPUT_VIDEO" ]; then
     exit 1
 fi
 
-# 检查Claude命令是否可用
-if ! command -v claude &> /dev/null; then
+# 检查LLM命令是否可用
+LLM_BIN=$(echo "$LLM_CMD" | awk '{print $1}')
+if ! command -v "$LLM_BIN" &> /dev/null; then
     echo "错误：Claude 命令行工具未安装或不在 PATH 中。"
     echo ""
     echo "请安装 Claude 命令行工具："
@@ -72,10 +81,12 @@ if ! command -v claude &> /dev/null; then
     exit 1
 fi
 
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 BASENAME=$(basename "${INPUT_VIDEO%.*}")
 TEMP_DIR="${BASENAME}_temp"
 INPUT_SRT="$TEMP_DIR/step3.5_translated.srt"
 OUTPUT_MD="$TEMP_DIR/xiaohongshu.md"
+SUMMARY_CACHE_DIR="$TEMP_DIR/summary_cache"
 
 # 检查输入文件是否存在
 if [ ! -d "$TEMP_DIR" ]; then
@@ -95,58 +106,26 @@ fi
 echo "📝 开始生成小红书文案"
 echo "输入文件: $INPUT_SRT"
 echo "输出文件: $OUTPUT_MD"
-echo "使用工具: Claude 命令行"
+echo "使用工具: $LLM_CMD"
 echo "=================================================="
 
-# 检查输入文件并创建前50条的摘要
-echo "📖 准备字幕摘要用于生成文案..."
-
-# 提取前50条字幕用于生成文案
-TEMP_SUMMARY=$(mktemp)
-python3 -c "
-import re
-
-def extract_first_n_subtitles(filename, n=50):
-    '''提取前N条字幕'''
-    with open(filename, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # 按双换行符分割条目
-    entries = re.split(r'\n\s*\n', content.strip())
-    entries = [entry.strip() for entry in entries if entry.strip()]
-    
-    # 只取前N条
-    selected_entries = entries[:n]
-    
-    print(f'原文件有 {len(entries)} 条字幕，提取前 {len(selected_entries)} 条用于生成文案')
-    
-    # 重新组合
-    result = '\n\n'.join(selected_entries)
-    return result
-
-summary_content = extract_first_n_subtitles('$INPUT_SRT', 50)
-with open('$TEMP_SUMMARY', 'w', encoding='utf-8') as f:
-    f.write(summary_content)
-" 
-
-SUMMARY_SIZE=$(wc -c < "$TEMP_SUMMARY")
-echo "摘要文件大小: $SUMMARY_SIZE 字节"
-
 # 准备生成文案的提示词
 GENERATION_PROMPT="我要发小红书，请根据字幕生成一段标题和小红书文案，注意识别专业领域，用专业但又幽默的海明威式的表达方式，标题30汉字以内，文案200汉字以内，注意排版易于阅读，生成结果格式如下 # title
 body"
 
 echo ""
-echo "🤖 正在调用 Claude 生成小红书文案..."
+echo "🤖 正在分片摘要完整字幕并生成小红书文案..."
 echo "提示词: $GENERATION_PROMPT"
 echo ""
 
 # 创建临时文件用于存储生成结果
 TEMP_OUTPUT=$(mktemp)
 
-# 使用Claude命令行工具生成文案
-# 将字幕摘要作为输入，通过管道传递给Claude
-if cat "$TEMP_SUMMARY" | claude --model claude-sonnet-4-20250514 "$GENERATION_PROMPT" > "$TEMP_OUTPUT" 2>&1; then
+# 分层摘要：完整字幕按token预算分片，片段并发摘要（按内容哈希缓存），最后汇总生成文案
+if python3 "$SCRIPT_DIR/srt_summarize.py" "$INPUT_SRT" \
+        --prompt "$GENERATION_PROMPT" \
+        --cache-dir "$SUMMARY_CACHE_DIR" \
+        --llm-cmd "$LLM_CMD" > "$TEMP_OUTPUT"; then
     # 检查输出文件是否有内容
     if [ -s "$TEMP_OUTPUT" ]; then
         # 提取实际的markdown内容，跳过Claude的欢迎信息
@@ -246,7 +225,7 @@ else
 fi
 
 # 清理临时文件
-rm -f "$TEMP_OUTPUT" "$TEMP_SUMMARY"
+rm -f "$TEMP_OUTPUT"
 
 echo "=================================================="
 echo "🎉 小红书文案生成完成！"
@@ -8,14 +8,82 @@
 import os
 import sys
 import re
-import json
-import subprocess
-import tempfile
+import shutil
 import argparse
 import time
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional
-from datetime import datetime, timedelta
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator, Callable
+
+# json/subprocess/tempfile 等模块只在真正处理时导入，保证 --check-deps 等快速路径的启动速度
+
+
+# Whisper --verbose 输出的段落行，如 "[01:02.500 --> 01:04.000]  文本"
+VERBOSE_LINE = re.compile(r'^\[((?:\d+:)?\d{2}:\d{2}\.\d{3}) --> ((?:\d+:)?\d{2}:\d{2}\.\d{3})\]\s*(.*)$')
+
+
+# 必需的外部命令及安装提示
+REQUIRED_TOOLS = {
+    'whisper': 'pip install openai-whisper',
+    'ffmpeg': 'brew install ffmpeg 或 sudo apt install ffmpeg',
+}
+
+
+# 依赖查找结果跨进程缓存：第一行为PATH，其余每行 "命令\t路径"；PATH变化时整体失效
+TOOL_CACHE_FILE = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'video_translater' / 'tools.txt'
+
+
+@lru_cache(maxsize=None)
+def load_tool_cache() -> Dict[str, str]:
+    """读取与当前PATH匹配的缓存记录"""
+    try:
+        lines = TOOL_CACHE_FILE.read_text(encoding='utf-8').splitlines()
+    except OSError:
+        return {}
+    if not lines or lines[0] != os.environ.get('PATH', ''):
+        return {}
+    return dict(line.split('\t', 1) for line in lines[1:] if '\t' in line)
+
+
+def save_tool_cache(cache: Dict[str, str]):
+    """写入缓存（先写临时文件再改名），写入失败时忽略"""
+    content = os.environ.get('PATH', '') + '\n' + ''.join(f"{name}\t{path}\n" for name, path in cache.items())
+    try:
+        TOOL_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = TOOL_CACHE_FILE.with_suffix(f'.{os.getpid()}.tmp')
+        tmp_path.write_text(content, encoding='utf-8')
+        tmp_path.replace(TOOL_CACHE_FILE)
+    except OSError:
+        pass
+
+
+@lru_cache(maxsize=None)
+def find_tool(name: str) -> Optional[str]:
+    """在PATH中查找命令，不启动子进程
+    
+    结果在进程内和跨进程（TOOL_CACHE_FILE）缓存；缓存的路径不再可执行时重新查找，未找到的命令不缓存。
+    """
+    cache = load_tool_cache()
+    path = cache.get(name)
+    if path and os.access(path, os.X_OK):
+        return path
+    
+    path = shutil.which(name)
+    if path:
+        cache[name] = path
+        save_tool_cache(cache)
+    return path
+
+
+def has_whisper_module() -> bool:
+    """检查当前解释器能否导入 whisper 模块（-l auto 的语言检测需要），只查找不导入"""
+    import importlib.util
+    return importlib.util.find_spec('whisper') is not None
+
+
+def check_dependencies() -> List[str]:
+    """返回缺失的必需命令列表"""
+    return [name for name in REQUIRED_TOOLS if find_tool(name) is None]
 
 
 class SimpleDisplay:
@@ -88,28 +156,36 @@ class SubtitleOptimizer:
         ms = int((seconds % 1) * 1000)
         return f"{hours:02d}:{minutes:02d}:{secs:02d},{ms:03d}"
     
+    def _parse_srt_block(self, block: str) -> Optional[Dict]:
+        """解析单个SRT块，无效块返回None"""
+        lines = block.strip().split('\n')
+        if len(lines) < 3:
+            return None
+        
+        index = lines[0]
+        time_line = lines[1]
+        text = '\n'.join(lines[2:])
+        
+        match = re.match(r'(\d{2}:\d{2}:\d{2},\d{3})\s*-->\s*(\d{2}:\d{2}:\d{2},\d{3})', time_line)
+        if not match:
+            return None
+        
+        return {
+            'index': int(index),
+            'start': self.srt_time_to_seconds(match.group(1)),
+            'end': self.srt_time_to_seconds(match.group(2)),
+            'text': text.strip()
+        }
+    
     def parse_srt(self, srt_content: str) -> List[Dict]:
         """解析SRT文件内容"""
         blocks = re.split(r'\n\s*\n', srt_content.strip())
         segments = []
         
         for block in blocks:
-            lines = block.strip().split('\n')
-            if len(lines) >= 3:
-                index = lines[0]
-                time_line = lines[1]
-                text = '\n'.join(lines[2:])
-                
-                match = re.match(r'(\d{2}:\d{2}:\d{2},\d{3})\s*-->\s*(\d{2}:\d{2}:\d{2},\d{3})', time_line)
-                if match:
-                    start_time = self.srt_time_to_seconds(match.group(1))
-                    end_time = self.srt_time_to_seconds(match.group(2))
-                    segments.append({
-                        'index': int(index),
-                        'start': start_time,
-                        'end': end_time,
-                        'text': text.strip()
-                    })
+            segment = self._parse_srt_block(block)
+            if segment:
+                segments.append(segment)
         
         return segments
     
@@ -122,6 +198,30 @@ class SubtitleOptimizer:
             srt_content += f"{seg['text']}\n\n"
         return srt_content
     
+    def _should_merge(self, current: Dict, next_seg: Dict) -> bool:
+        """判断相邻两段是否需要合并"""
+        current_words = self.count_words(current['text'])
+        next_words = self.count_words(next_seg['text'])
+        total_words = current_words + next_words
+        max_words = self.max_word_count_cjk if self.is_mainly_cjk(current['text']) else self.max_word_count_english
+        return (current_words < 5 or next_words < 5) and total_words <= max_words
+    
+    def _merge_pair(self, current: Dict, next_seg: Dict) -> Dict:
+        """合并相邻两段"""
+        merged_text = current['text']
+        if self.is_mainly_cjk(current['text']):
+            merged_text += next_seg['text']
+        else:
+            merged_text += ' ' + next_seg['text']
+        return {'start': current['start'], 'end': next_seg['end'], 'text': merged_text}
+    
+    def _is_noise(self, text: str) -> bool:
+        """判断是否为音乐、音效等噪音段"""
+        return (text.startswith('【') or text.startswith('[') or
+                text.startswith('(') or text.startswith('（') or
+                text.startswith('♪') or text.startswith('♫') or
+                len(text.strip()) == 0)
+    
     def optimize_subtitle(self, srt_content: str) -> str:
         """执行完整的字幕优化流程"""
         segments = self.parse_srt(srt_content)
@@ -146,30 +246,11 @@ class SubtitleOptimizer:
         i = 0
         while i < len(segments):
             current = segments[i]
-            current_words = self.count_words(current['text'])
             
-            should_merge = False
-            if i < len(segments) - 1:
-                next_seg = segments[i + 1]
-                next_words = self.count_words(next_seg['text'])
-                total_words = current_words + next_words
-                max_words = self.max_word_count_cjk if self.is_mainly_cjk(current['text']) else self.max_word_count_english
-                if (current_words < 5 or next_words < 5) and total_words <= max_words:
-                    should_merge = True
-            
-            if should_merge:
-                merged_text = current['text']
-                if self.is_mainly_cjk(current['text']):
-                    merged_text += next_seg['text']
-                else:
-                    merged_text += ' ' + next_seg['text']
-                
-                merged_segments.append({
-                    'index': len(merged_segments) + 1,
-                    'start': current['start'],
-                    'end': next_seg['end'],
-                    'text': merged_text
-                })
+            if i < len(segments) - 1 and self._should_merge(current, segments[i + 1]):
+                merged = self._merge_pair(current, segments[i + 1])
+                merged['index'] = len(merged_segments) + 1
+                merged_segments.append(merged)
                 i += 2
             else:
                 merged_segments.append({
@@ -184,10 +265,7 @@ class SubtitleOptimizer:
         filtered_segments = []
         for seg in merged_segments:
             text = seg['text'].strip()
-            if not (text.startswith('【') or text.startswith('[') or 
-                   text.startswith('(') or text.startswith('（') or
-                   text.startswith('♪') or text.startswith('♫') or
-                   len(text.strip()) == 0):
+            if not self._is_noise(text):
                 filtered_segments.append({
                     'index': len(filtered_segments) + 1,
                     'start': seg['start'],
@@ -199,6 +277,147 @@ class SubtitleOptimizer:
         self.display.success(f"优化完成: {original_count} -> {final_count} 段")
         
         return self.segments_to_srt(filtered_segments)
+    
+    # --- 流式优化：各阶段都是生成器，最多只缓存一个待定段落 ---
+    
+    def iter_srt_cues(self, lines: Iterable[str]) -> Iterator[Dict]:
+        """从逐行输入（文件对象或 follow_lines）中增量解析SRT段落"""
+        block_lines = []
+        for line in lines:
+            line = line.rstrip('\n')
+            if line.strip():
+                block_lines.append(line)
+                continue
+            if block_lines:
+                segment = self._parse_srt_block('\n'.join(block_lines))
+                block_lines = []
+                if segment:
+                    yield segment
+        
+        if block_lines:
+            segment = self._parse_srt_block('\n'.join(block_lines))
+            if segment:
+                yield segment
+    
+    def verbose_time_to_seconds(self, verbose_time: str) -> float:
+        """Whisper --verbose 时间（[HH:]MM:SS.mmm）转秒，与解析其SRT文件得到的值相同"""
+        parts = verbose_time.split(':')
+        if len(parts) == 2:
+            parts.insert(0, '00')
+        return self.srt_time_to_seconds(':'.join(parts))
+    
+    def iter_verbose_cues(self, lines: Iterable[str]) -> Iterator[Dict]:
+        """从Whisper --verbose 的标准输出中逐行解析段落，Whisper每识别出一段即可处理
+        
+        与Whisper同时写出的SRT文件内容一致：文本去除首尾空白并替换 "-->"，空文本段丢弃。
+        """
+        for line in lines:
+            match = VERBOSE_LINE.match(line.strip())
+            if not match:
+                continue
+            text = match.group(3).strip().replace('-->', '->')
+            if text:
+                yield {
+                    'start': self.verbose_time_to_seconds(match.group(1)),
+                    'end': self.verbose_time_to_seconds(match.group(2)),
+                    'text': text
+                }
+    
+    def quantize_stream(self, segments: Iterable[Dict]) -> Iterator[Dict]:
+        """把时间戳截断到SRT的毫秒精度，与批处理先写成SRT再解析的结果一致"""
+        for seg in segments:
+            yield {
+                'start': self.srt_time_to_seconds(self.seconds_to_srt_time(seg['start'])),
+                'end': self.srt_time_to_seconds(self.seconds_to_srt_time(seg['end'])),
+                'text': seg['text']
+            }
+    
+    def smooth_stream(self, segments: Iterable[Dict]) -> Iterator[Dict]:
+        """流式时间戳优化：间隔小于阈值时取中点"""
+        threshold_sec = self.time_threshold_ms / 1000.0
+        pending = None
+        for seg in segments:
+            if pending is not None:
+                time_gap = seg['start'] - pending['end']
+                if 0 < time_gap < threshold_sec:
+                    mid_time = (pending['end'] + seg['start']) / 2
+                    pending['end'] = mid_time
+                    seg['start'] = mid_time
+                yield pending
+            pending = seg
+        
+        if pending is not None:
+            yield pending
+    
+    def merge_stream(self, segments: Iterable[Dict]) -> Iterator[Dict]:
+        """流式合并短句，与批处理一样两两贪心合并"""
+        pending = None
+        for seg in segments:
+            if pending is None:
+                pending = seg
+            elif self._should_merge(pending, seg):
+                yield self._merge_pair(pending, seg)
+                pending = None
+            else:
+                yield pending
+                pending = seg
+        
+        if pending is not None:
+            yield pending
+    
+    def filter_stream(self, segments: Iterable[Dict]) -> Iterator[Dict]:
+        """流式过滤噪音段"""
+        for seg in segments:
+            text = seg['text'].strip()
+            if not self._is_noise(text):
+                yield {'start': seg['start'], 'end': seg['end'], 'text': text}
+    
+    def optimize_stream(self, segments: Iterable[Dict]) -> Iterator[str]:
+        """流式执行完整的字幕优化流程，逐段输出最终的SRT块
+        
+        输出与 optimize_subtitle 的批处理结果逐字节一致；各优化阶段最多缓存一个待定段落。
+        """
+        counts = {'in': 0, 'out': 0}
+        
+        def counted(source: Iterable[Dict]) -> Iterator[Dict]:
+            for seg in source:
+                counts['in'] += 1
+                yield seg
+        
+        pipeline = self.filter_stream(self.merge_stream(self.smooth_stream(counted(segments))))
+        for seg in pipeline:
+            counts['out'] += 1
+            yield (f"{counts['out']}\n"
+                   f"{self.seconds_to_srt_time(seg['start'])} --> {self.seconds_to_srt_time(seg['end'])}\n"
+                   f"{seg['text']}\n\n")
+        
+        self.display.success(f"优化完成: {counts['in']} -> {counts['out']} 段")
+
+
+def follow_lines(path: str, is_done: Callable[[], bool], poll_interval: float = 0.2) -> Iterator[str]:
+    """逐行读取正在写入的文件，is_done() 为真且读完剩余内容后结束"""
+    while not Path(path).exists():
+        if is_done():
+            return
+        time.sleep(poll_interval)
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        partial = ''
+        while True:
+            done = is_done()
+            line = f.readline()
+            if line:
+                partial += line
+                if partial.endswith('\n'):
+                    yield partial
+                    partial = ''
+                continue
+            if done:
+                break
+            time.sleep(poll_interval)
+        
+        if partial:
+            yield partial
 
 
 class WhisperProcessor:
@@ -212,6 +431,9 @@ class WhisperProcessor:
     
     def probe_video_info(self, video_path: str) -> Dict:
         """探测视频文件信息"""
+        import json
+        import subprocess
+        
         try:
             cmd = ['ffprobe', '-v', 'quiet', '-print_format', 'json',
                    '-show_format', '-show_streams', video_path]
@@ -222,6 +444,9 @@ class WhisperProcessor:
     
     def extract_audio(self, video_path: str, audio_path: str) -> bool:
         """从视频提取音频"""
+        import subprocess
+        from datetime import timedelta
+        
         file_ext = Path(video_path).suffix.lower()
         
         # 显示视频信息
@@ -265,77 +490,60 @@ class WhisperProcessor:
             self.display.error("未找到 ffmpeg")
             return False
     
-    def detect_language(self, audio_path: str) -> Optional[str]:
-        """快速检测语言"""
+    def _load_audio_head(self, audio_path: str, seconds: int = 30):
+        """只读取音频开头若干秒，返回16kHz单声道float32数组"""
+        import wave
+        import numpy as np
+        import whisper
+        
+        sample_rate = whisper.audio.SAMPLE_RATE
+        try:
+            with wave.open(audio_path, 'rb') as wav:
+                if (wav.getframerate() == sample_rate and wav.getnchannels() == 1
+                        and wav.getsampwidth() == 2):
+                    frames = wav.readframes(sample_rate * seconds)
+                    return np.frombuffer(frames, np.int16).astype(np.float32) / 32768.0
+        except wave.Error:
+            pass
+        
+        # 非16kHz单声道PCM时交给whisper解码
+        return whisper.load_audio(audio_path)[:sample_rate * seconds]
+    
+    def detect_language(self, audio_path: str) -> Tuple[Optional[str], float]:
+        """根据前30秒音频直接取模型的语言概率，返回 (语言代码, 置信度)
+        
+        不生成任何转录文件，多个进程可以同时检测。
+        """
         self.display.progress("检测音频语言...")
         
         try:
-            cmd = [
-                'whisper', audio_path,
-                '--model', self.model,
-                '--output_format', 'txt',
-                '--output_dir', '/tmp',
-                '--clip_timestamps', '0,30',
-                '--verbose', 'True'  # 显示详细信息
-            ]
-            
-            # 让 Whisper 的输出直接显示在终端，同时捕获输出用于解析
-            result = subprocess.run(cmd, text=True)
-            
-            # 读取生成的文件来获取语言信息
-            try:
-                with open('/tmp/audio.txt', 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    if content.strip():  # 如果有内容，说明检测成功
-                        # 从文件名推断语言（Whisper会生成带语言后缀的文件）
-                        temp_files = list(Path('/tmp').glob('audio*.txt'))
-                        for temp_file in temp_files:
-                            if temp_file.name != 'audio.txt':
-                                # 文件名格式可能是 audio.en.txt 等
-                                parts = temp_file.stem.split('.')
-                                if len(parts) > 1:
-                                    detected_lang = parts[-1]
-                                    self.display.success(f"检测到语言: {detected_lang}")
-                                    # 清理临时文件
-                                    try:
-                                        os.remove('/tmp/audio.txt')
-                                        os.remove(str(temp_file))
-                                    except:
-                                        pass
-                                    return detected_lang
-                        
-                        # 如果没有找到语言后缀，默认返回英文
-                        self.display.success("检测到语言: en")
-                        try:
-                            os.remove('/tmp/audio.txt')
-                        except:
-                            pass
-                        return 'en'
-            except:
-                pass
-            
-            return None
-            
+            import whisper
+        except ImportError:
+            self.display.error("未找到 whisper Python 模块，跳过语言检测")
+            return None, 0.0
+        
+        try:
+            model = whisper.load_model(self.model)
+            audio = whisper.pad_or_trim(self._load_audio_head(audio_path))
+            mel = whisper.log_mel_spectrogram(audio, n_mels=model.dims.n_mels).to(model.device)
+            _, probs = model.detect_language(mel)
         except Exception as e:
-            return None
+            self.display.error(f"语言检测失败: {e}")
+            return None, 0.0
+        
+        language = max(probs, key=probs.get)
+        confidence = float(probs[language])
+        self.display.success(f"检测到语言: {language} (置信度: {confidence:.2f})")
+        return language, confidence
     
     def transcribe_cjk(self, audio_path: str, language: str, output_dir: str) -> str:
         """使用优化的中日韩配置转录"""
+        import subprocess
+        
         self.display.progress(f"使用优化的{language}配置转录...")
         
         try:
-            cmd = [
-                'whisper', audio_path,
-                '--model', self.model,
-                '--language', language,
-                '--output_format', 'srt',
-                '--output_dir', output_dir,
-                '--no_speech_threshold', '0.3',
-                '--logprob_threshold', '-0.8',
-                '--compression_ratio_threshold', '1.8',
-                '--temperature', str(self.temperature),
-                '--initial_prompt', self.initial_prompt
-            ]
+            cmd = self._cjk_command(audio_path, language, output_dir)
             
             # 让 Whisper 的输出直接显示在终端
             subprocess.run(cmd, check=True)
@@ -352,8 +560,51 @@ class WhisperProcessor:
         except subprocess.CalledProcessError as e:
             raise RuntimeError(f"Whisper转录失败: {e}")
     
+    def _cjk_command(self, audio_path: str, language: str, output_dir: str) -> List[str]:
+        return [
+            'whisper', audio_path,
+            '--model', self.model,
+            '--language', language,
+            '--output_format', 'srt',
+            '--output_dir', output_dir,
+            '--no_speech_threshold', '0.3',
+            '--logprob_threshold', '-0.8',
+            '--compression_ratio_threshold', '1.8',
+            '--temperature', str(self.temperature),
+            '--initial_prompt', self.initial_prompt
+        ]
+    
+    def stream_cjk(self, audio_path: str, language: str, output_dir: str) -> Iterator[str]:
+        """使用中日韩配置转录，逐行返回Whisper --verbose 的输出（同时显示在终端）"""
+        import subprocess
+        
+        self.display.progress(f"使用优化的{language}配置边识别边优化...")
+        
+        cmd = self._cjk_command(audio_path, language, output_dir) + ['--verbose', 'True']
+        # 子进程输出到管道时默认块缓冲，需要关闭缓冲才能逐段拿到结果
+        env = dict(os.environ, PYTHONUNBUFFERED='1', PYTHONIOENCODING='utf-8')
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True,
+                                   encoding='utf-8', errors='replace', env=env)
+        try:
+            for line in process.stdout:
+                print(line, end='', flush=True)
+                yield line
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+        finally:
+            process.stdout.close()
+        
+        returncode = process.wait()
+        if returncode != 0:
+            raise RuntimeError(f"Whisper转录失败: 返回码 {returncode}")
+        self.display.success("中日韩优化配置转录完成")
+    
     def transcribe_standard(self, audio_path: str, language: Optional[str], output_dir: str) -> str:
         """使用标准配置转录"""
+        import subprocess
+        
         self.display.progress("使用标准配置转录...")
         
         try:
@@ -385,16 +636,15 @@ class WhisperProcessor:
         except subprocess.CalledProcessError as e:
             raise RuntimeError(f"Whisper转录失败: {e}")
     
-    def json_to_srt(self, json_path: str) -> str:
-        """将Whisper JSON输出转换为整句级SRT"""
-        self.display.progress("转换为整句级SRT格式...")
-        
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+    def iter_sentences(self, segments: Iterable[Dict]) -> Iterator[Dict]:
+        """把带词级时间戳的Whisper段落切分为整句，逐句输出 {'start', 'end', 'text'}
         
+        批处理（json_to_srt）和流式处理共用此逻辑。句子到词的匹配需要向后查找，
+        因此会先收集全部词级时间戳。
+        """
         # 提取所有词级时间戳
         all_words = []
-        for segment in data['segments']:
+        for segment in segments:
             if 'words' in segment:
                 for word_info in segment['words']:
                     all_words.append({
@@ -424,7 +674,7 @@ class WhisperProcessor:
                 merged_sentences.append(sentence.strip())
         
         # 映射句子到词级时间戳
-        sentence_segments = []
+        previous_end = None
         word_index = 0
         
         for sentence_idx, sentence in enumerate(merged_sentences):
@@ -456,18 +706,31 @@ class WhisperProcessor:
                 if sentence_idx == 0:
                     sentence_start_time = all_words[0]['start'] if all_words else 0
                 else:
-                    sentence_start_time = sentence_segments[-1]['end'] if sentence_segments else 0
+                    sentence_start_time = previous_end if previous_end is not None else 0
                 
                 if sentence_end_time is None:
                     avg_duration = 0.5
                     estimated_duration = len(sentence_words) * avg_duration
                     sentence_end_time = sentence_start_time + estimated_duration
             
-            sentence_segments.append({
+            previous_end = sentence_end_time
+            yield {
                 'start': sentence_start_time,
                 'end': sentence_end_time,
                 'text': sentence
-            })
+            }
+    
+    def json_to_srt(self, json_path: str) -> str:
+        """将Whisper JSON输出转换为整句级SRT"""
+        import json
+        
+        self.display.progress("转换为整句级SRT格式...")
+        
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        sentence_segments = list(self.iter_sentences(data['segments']))
+        word_count = sum(len(segment['words']) for segment in data['segments'] if 'words' in segment)
         
         # 生成SRT内容
         srt_content = ""
@@ -478,8 +741,8 @@ class WhisperProcessor:
         
         # 统计匹配准确率
         total_matched = sum([len(seg['text'].split()) for seg in sentence_segments])
-        if len(all_words) > 0:
-            accuracy = 100 * total_matched / len(all_words)
+        if word_count > 0:
+            accuracy = 100 * total_matched / word_count
             self.display.success(f"词匹配准确率: {accuracy:.1f}%")
         
         self.display.success(f"生成了 {len(sentence_segments)} 个字幕段落")
@@ -496,12 +759,33 @@ class WhisperProcessor:
 
 def main():
     parser = argparse.ArgumentParser(description='简洁的视频字幕提取和优化脚本')
-    parser.add_argument('video_file', help='输入视频文件')
+    parser.add_argument('video_file', nargs='?', help='输入视频文件')
     parser.add_argument('-l', '--language', default='auto', help='指定语言代码 (默认: auto)')
     parser.add_argument('-o', '--output', help='输出SRT文件名 (默认: 视频文件名.srt)')
+    parser.add_argument('--min-confidence', type=float, default=0.5,
+                        help='自动检测语言的最低置信度，低于此值交给whisper自行识别 (默认: 0.5)')
+    parser.add_argument('--stream', action='store_true', help='流式优化字幕，逐段写出结果')
+    parser.add_argument('--check-deps', action='store_true', help='只检查依赖后退出')
     
     args = parser.parse_args()
     
+    if args.check_deps:
+        for name in REQUIRED_TOOLS:
+            path = find_tool(name)
+            if path:
+                print(f"✅ {name}: {path}")
+            else:
+                print(f"❌ {name}: 未找到，请先安装: {REQUIRED_TOOLS[name]}")
+        module_found = has_whisper_module()
+        if module_found:
+            print("✅ whisper Python 模块: 可导入")
+        else:
+            print(f"❌ whisper Python 模块: 当前解释器无法导入，-l auto 需要: {REQUIRED_TOOLS['whisper']}")
+        sys.exit(1 if check_dependencies() or not module_found else 0)
+    
+    if not args.video_file:
+        parser.error('请提供输入视频文件')
+    
     # 检查输入文件
     video_path = Path(args.video_file)
     if not video_path.exists():
@@ -514,23 +798,25 @@ def main():
     else:
         output_path = video_path.with_suffix('.srt')
     
-    # 检查依赖
-    dependencies_ok = True
+    # 检查依赖（只查找PATH，不启动 whisper/ffmpeg）
+    missing = check_dependencies()
+    for name in missing:
+        print(f"❌ 错误：未找到 {name}，请先安装: {REQUIRED_TOOLS[name]}")
     
-    try:
-        subprocess.run(['whisper', '--help'], capture_output=True, check=True)
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        print("❌ 错误：未找到 whisper，请先安装: pip install openai-whisper")
-        dependencies_ok = False
+    if missing:
+        sys.exit(1)
     
-    try:
-        subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True)
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        print("❌ 错误：未找到 ffmpeg")
-        dependencies_ok = False
+    # 自动检测语言需要在当前解释器中导入 whisper 模块（brew/pipx 安装的命令行工具不提供），
+    # 没有时跳过检测，由 whisper 转录时自行识别语言
+    auto_detect = args.language == 'auto'
+    if auto_detect and not has_whisper_module():
+        print(f"⚠️  警告：当前解释器 ({sys.executable}) 无法导入 whisper Python 模块，跳过语言检测，由 whisper 转录时识别")
+        print(f"   如需检测语言，请安装: {REQUIRED_TOOLS['whisper']}，或用 -l 指定语言代码")
+        auto_detect = False
     
-    if not dependencies_ok:
-        sys.exit(1)
+    import json
+    import tempfile
+    from contextlib import closing
     
     # 显示开始信息
     print(f"\n🚀 视频字幕提取器")
@@ -560,39 +846,69 @@ def main():
             display.step(2, 3, "语音识别")
             
             # 语言检测和处理
-            detected_language = args.language
-            if args.language == 'auto':
-                detected_language = whisper.detect_language(str(audio_path))
+            detected_language = None if args.language == 'auto' else args.language
+            if auto_detect:
+                detected_language, confidence = whisper.detect_language(str(audio_path))
+                if detected_language and confidence < args.min_confidence:
+                    display.info(f"置信度低于 {args.min_confidence:.2f}，不指定语言")
+                    detected_language = None
             
             # 根据语言选择处理方式
-            if detected_language and detected_language in ['zh', 'ja', 'ko']:
-                # 中日韩使用优化配置
-                srt_path = whisper.transcribe_cjk(str(audio_path), detected_language, str(temp_path))
-                with open(srt_path, 'r', encoding='utf-8') as f:
-                    srt_content = f.read()
+            if args.stream:
+                # 步骤3在识别结果上流式进行，逐段写出
+                if detected_language and detected_language in ['zh', 'ja', 'ko']:
+                    # 解析Whisper的逐段输出，识别出一段即优化一段
+                    source = whisper.stream_cjk(str(audio_path), detected_language, str(temp_path))
+                    cues = optimizer.iter_verbose_cues(source)
+                else:
+                    # 整句切分依赖词级时间戳，只能在识别完成后读取JSON再逐句优化
+                    json_path = whisper.transcribe_standard(str(audio_path), detected_language, str(temp_path))
+                    with open(json_path, 'r', encoding='utf-8') as f:
+                        source = whisper.iter_sentences(json.load(f)['segments'])
+                    cues = optimizer.quantize_stream(source)
+                
+                display.step(3, 3, "字幕优化（流式）")
+                display.progress(f"逐段写入 {output_path.name}...")
+                final_segments = 0
+                try:
+                    with closing(source), open(output_path, 'w', encoding='utf-8') as f:
+                        for block in optimizer.optimize_stream(cues):
+                            f.write(block)
+                            f.flush()
+                            final_segments += 1
+                except Exception:
+                    # 失败时不留下不完整的字幕文件
+                    output_path.unlink(missing_ok=True)
+                    raise
             else:
-                # 其他语言使用标准配置
-                json_path = whisper.transcribe_standard(str(audio_path), detected_language, str(temp_path))
-                srt_content = whisper.json_to_srt(json_path)
-            
-            # 统计原始段落数
-            original_segments = len(re.split(r'\n\s*\n', srt_content.strip()))
-            display.success(f"语音识别完成，生成 {original_segments} 个段落")
-            
-            # 步骤3: 字幕优化
-            display.step(3, 3, "字幕优化")
-            optimized_srt = optimizer.optimize_subtitle(srt_content)
-            
-            # 保存最终结果
-            display.progress(f"保存到 {output_path.name}...")
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(optimized_srt)
+                if detected_language and detected_language in ['zh', 'ja', 'ko']:
+                    # 中日韩使用优化配置
+                    srt_path = whisper.transcribe_cjk(str(audio_path), detected_language, str(temp_path))
+                    with open(srt_path, 'r', encoding='utf-8') as f:
+                        srt_content = f.read()
+                else:
+                    # 其他语言使用标准配置
+                    json_path = whisper.transcribe_standard(str(audio_path), detected_language, str(temp_path))
+                    srt_content = whisper.json_to_srt(json_path)
+                
+                # 统计原始段落数
+                original_segments = len(re.split(r'\n\s*\n', srt_content.strip()))
+                display.success(f"语音识别完成，生成 {original_segments} 个段落")
+                
+                # 步骤3: 字幕优化
+                display.step(3, 3, "字幕优化")
+                optimized_srt = optimizer.optimize_subtitle(srt_content)
+                
+                # 保存最终结果
+                display.progress(f"保存到 {output_path.name}...")
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    f.write(optimized_srt)
+                
+                final_segments = len(re.split(r'\n\s*\n', optimized_srt.strip()))
             
             total_time = time.time() - total_start_time
             
             # 显示完成信息
-            final_segments = len(re.split(r'\n\s*\n', optimized_srt.strip()))
-            
             print(f"\n🎉 处理完成！")
             display.success(f"输出: {output_path.name}")
             display.success(f"用时: {total_time:.1f}秒")
@@ -12,6 +12,8 @@ show_help() {
     echo "  -srt              仅下载字幕文件（.srt格式）"
     echo "  -o, --output NAME 指定输出文件名前缀（不含扩展名）"
     echo "  -c, --continue    启用续传功能"
+    echo "  -split            视频流和音频流并行分离下载（可续传，ffprobe校验完整性）"
+    echo "  --extract-audio FILE  分离下载时音频到达后立即转换为WAV（默认: 第一阶段临时目录的 original_audio.wav）"
     echo "  --proxy           使用代理下载（http://127.0.0.1:1087）"
     echo "  -h, --help        显示帮助信息"
     echo ""
@@ -27,6 +29,7 @@ show_help() {
     echo "  $0 -hd -o video_1751544231_7932 -c https://youtu.be/VIDEO_ID"
     echo "  $0 --proxy https://youtu.be/VIDEO_ID"
     echo "  $0 -srt https://youtu.be/VIDEO_ID"
+    echo "  $0 -hd -split -o my_video https://youtu.be/VIDEO_ID"
     echo ""
     echo "说明:"
     echo "  - 默认下载最低分辨率以加速处理"
@@ -36,6 +39,8 @@ show_help() {
     echo "  - 仅使用Edge浏览器的Cookie进行下载"
     echo "  - 默认不使用代理，使用 --proxy 参数启用代理下载"
     echo "  - 需要在Edge浏览器中登录相应网站账户"
+    echo "  - 环境变量 YTDLP_COOKIES_BROWSER 可指定Cookie来源浏览器，设为空则不使用Cookie"
+    echo "  - 使用 -split 生成 _video/_audio 分离文件，音频下载完成即开始提取音频，无需等待视频"
 }
 
 # 初始化变量
@@ -45,6 +50,8 @@ SRT_MODE=false
 CUSTOM_OUTPUT=""
 ENABLE_CONTINUE=false
 USE_PROXY=false
+SPLIT_MODE=false
+EXTRACT_AUDIO_TO=""
 
 # 解析参数
 while [[ $# -gt 0 ]]; do
@@ -69,6 +76,14 @@ while [[ $# -gt 0 ]]; do
             USE_PROXY=true
             shift
             ;;
+        -split)
+            SPLIT_MODE=true
+            shift
+            ;;
+        --extract-audio)
+            EXTRACT_AUDIO_TO="$2"
+            shift 2
+            ;;
         -h|--help)
             show_help
             exit 0
@@ -199,9 +214,187 @@ if [ "$USE_PROXY" = true ]; then
 else
     echo "代理模式: 禁用"
 fi
-echo "使用Edge浏览器Cookie进行认证..."
+# Cookie来源浏览器（默认Edge，YTDLP_COOKIES_BROWSER 设为空则不使用Cookie）
+COOKIE_ARGS=()
+COOKIES_BROWSER="${YTDLP_COOKIES_BROWSER-edge}"
+if [ -n "$COOKIES_BROWSER" ]; then
+    COOKIE_ARGS=(--cookies-from-browser "$COOKIES_BROWSER")
+    echo "使用${COOKIES_BROWSER}浏览器Cookie进行认证..."
+else
+    echo "不使用浏览器Cookie"
+fi
 echo "=================================================="
 
+# 媒体完整性校验（verify_media）
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+source "$SCRIPT_DIR/utils/media_helper.sh"
+
+# 分离下载：视频流和音频流并行下载、可续传、完成后校验
+if [ "$SPLIT_MODE" = true ] && [ "$SRT_MODE" = false ]; then
+    if [ "$HD_MODE" = true ]; then
+        VIDEO_FORMAT="bestvideo[height>=720][ext=webm]/bestvideo[height>=720]/bestvideo"
+    else
+        VIDEO_FORMAT="bestvideo[height<=480][ext=webm]/bestvideo[height<=480]/worstvideo"
+    fi
+    AUDIO_FORMAT="bestaudio[ext=webm]/bestaudio"
+    VIDEO_PREFIX="${TARGET_FILENAME}_video"
+    AUDIO_PREFIX="${TARGET_FILENAME}_audio"
+    
+    # 已有合并好且校验通过的视频（如 download_and_process.sh 合并后删除了分离文件）时直接使用
+    for merged_file in "${TARGET_FILENAME}.mp4" "${TARGET_FILENAME}.mkv" "${TARGET_FILENAME}.webm"; do
+        if verify_media "$merged_file"; then
+            echo "✅ 已有合并后的视频文件且校验通过，跳过下载: $merged_file"
+            echo "=================================================="
+            echo "DOWNLOADED_FILE:$merged_file"
+            exit 0
+        fi
+    done
+    
+    # 默认把音频直接提取到 process_video_part1.sh 使用的临时目录
+    if [ -z "$EXTRACT_AUDIO_TO" ]; then
+        EXTRACT_AUDIO_TO="$(pwd)/${TARGET_FILENAME%_hd}_temp/original_audio.wav"
+    fi
+    
+    PROXY_ARGS=(--proxy "")
+    if [ "$USE_PROXY" = true ]; then
+        PROXY_ARGS=(--proxy "${HTTP_PROXY:-${http_proxy:-${HTTPS_PROXY:-${https_proxy:-http://127.0.0.1:1087}}}}")
+    fi
+    
+    # 查找已完成的流文件（忽略续传用的 .part/.ytdl 文件）
+    find_stream_file() {
+        local prefix="$1"
+        local file
+        for file in "$prefix".*; do
+            case "$file" in
+                *.part|*.ytdl|*.part-Frag*|*.temp.*) continue ;;
+            esac
+            if [ -f "$file" ]; then
+                echo "$file"
+                return 0
+            fi
+        done
+        return 1
+    }
+    
+    # 下载单个流，最多3次；失败保留 .part 文件以便续传
+    download_stream() {
+        local label="$1"
+        local format="$2"
+        local prefix="$3"
+        local file
+        
+        file=$(find_stream_file "$prefix" || true)
+        if [ -n "$file" ] && verify_media "$file"; then
+            echo "✅ [$label] 已存在且校验通过，跳过下载: $file"
+            return 0
+        fi
+        # 校验失败的文件会被yt-dlp当作已下载，先删除（保留 .part 文件用于续传）
+        if [ -n "$file" ]; then
+            echo "⚠️  [$label] 已有文件校验失败，删除后重新下载: $file"
+            rm -f "$file"
+        fi
+        
+        for attempt in 1 2 3; do
+            echo "[$label] 尝试 $attempt/3: 下载（格式: $format）..."
+            if yt-dlp \
+                "${COOKIE_ARGS[@]}" \
+                --format "$format" \
+                --output "${prefix}.%(ext)s" \
+                --no-playlist \
+                --continue \
+                --part \
+                --no-mtime \
+                --no-progress \
+                "${PROXY_ARGS[@]}" \
+                --socket-timeout 30 \
+                --retries 10 \
+                --fragment-retries 10 \
+                --user-agent "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36" \
+                --no-check-certificate \
+                "$VIDEO_URL"; then
+                file=$(find_stream_file "$prefix" || true)
+                if [ -n "$file" ] && verify_media "$file"; then
+                    echo "✅ [$label] 下载完成，ffprobe校验通过: $file"
+                    return 0
+                fi
+                echo "❌ [$label] 文件校验失败，删除后重新下载: ${file:-未找到文件}"
+                [ -n "$file" ] && rm -f "$file"
+            else
+                echo "❌ [$label] 下载失败（尝试 $attempt/3），保留部分文件用于续传"
+            fi
+            
+            if [ $attempt -lt 3 ]; then
+                sleep 5
+            fi
+        done
+        return 1
+    }
+    
+    echo "开始分离下载（视频流与音频流并行，支持续传）..."
+    download_stream "视频" "$VIDEO_FORMAT" "$VIDEO_PREFIX" &
+    VIDEO_PID=$!
+    download_stream "音频" "$AUDIO_FORMAT" "$AUDIO_PREFIX" &
+    AUDIO_PID=$!
+    
+    set +e
+    
+    # 音频先到：立即开始提取第一阶段所需的WAV，不等待视频
+    wait $AUDIO_PID
+    AUDIO_EXIT_CODE=$?
+    AUDIO_FILE=$(find_stream_file "$AUDIO_PREFIX")
+    EXTRACT_PID=""
+    if [ $AUDIO_EXIT_CODE -eq 0 ]; then
+        if [ -s "$EXTRACT_AUDIO_TO" ]; then
+            echo "✅ 已有提取的音频，跳过: $EXTRACT_AUDIO_TO"
+        elif command -v ffmpeg &> /dev/null; then
+            echo "🔊 音频流已就绪，开始提取音频: $EXTRACT_AUDIO_TO"
+            mkdir -p "$(dirname "$EXTRACT_AUDIO_TO")"
+            # 先写入临时文件再改名，避免第一阶段读到不完整的WAV
+            (ffmpeg -i "$AUDIO_FILE" -vn -acodec pcm_s16le -ar 16000 -f wav "${EXTRACT_AUDIO_TO}.part" -y -hide_banner -loglevel error \
+                && mv "${EXTRACT_AUDIO_TO}.part" "$EXTRACT_AUDIO_TO") &
+            EXTRACT_PID=$!
+        fi
+    fi
+    
+    wait $VIDEO_PID
+    VIDEO_EXIT_CODE=$?
+    VIDEO_FILE=$(find_stream_file "$VIDEO_PREFIX")
+    
+    if [ -n "$EXTRACT_PID" ]; then
+        if wait $EXTRACT_PID; then
+            echo "✅ 音频提取完成: $EXTRACT_AUDIO_TO"
+        else
+            echo "⚠️  音频提取失败，第一阶段将重新提取"
+            rm -f "${EXTRACT_AUDIO_TO}.part"
+        fi
+    fi
+    
+    set -e
+    
+    echo "=================================================="
+    if [ $VIDEO_EXIT_CODE -ne 0 ] || [ $AUDIO_EXIT_CODE -ne 0 ]; then
+        echo "❌ 分离下载失败！"
+        [ $VIDEO_EXIT_CODE -ne 0 ] && echo "  视频流下载或校验失败"
+        [ $AUDIO_EXIT_CODE -ne 0 ] && echo "  音频流下载或校验失败"
+        echo "重新运行此命令可从断点续传"
+        echo "=================================================="
+        exit 1
+    fi
+    
+    echo "✅ 分离下载成功！"
+    echo "视频文件: $VIDEO_FILE ($(ls -lh "$VIDEO_FILE" | awk '{print $5}'))"
+    echo "音频文件: $AUDIO_FILE ($(ls -lh "$AUDIO_FILE" | awk '{print $5}'))"
+    echo ""
+    echo "📝 下一步建议："
+    echo "1. 运行第一阶段处理: ./process_video_part1.sh \"$VIDEO_FILE\""
+    echo "=================================================="
+    
+    # 输出文件信息供其他脚本使用
+    echo "AUDIO_FILE:$AUDIO_FILE"
+    echo "DOWNLOADED_FILE:$VIDEO_FILE"
+    exit 0
+fi
+
 # 检查目标文件是否已存在（避免重复下载）
 if [ "$SRT_MODE" = true ]; then
     EXPECTED_FILES=("${TARGET_FILENAME}.srt" "${TARGET_FILENAME}.vtt")
@@ -211,7 +404,12 @@ fi
 EXISTING_FILE=""
 
 for expected_file in "${EXPECTED_FILES[@]}"; do
-    if [ -f "$expected_file" ] && [ -s "$expected_file" ]; then
+    if [ "$SRT_MODE" = true ]; then
+        if [ -f "$expected_file" ] && [ -s "$expected_file" ]; then
+            EXISTING_FILE="$expected_file"
+            break
+        fi
+    elif verify_media "$expected_file"; then
         EXISTING_FILE="$expected_file"
         break
     fi
@@ -303,7 +501,7 @@ download_subtitle_with_edge() {
     echo "🔍 检查字幕可用性..."
     
     # 使用 --list-subs 检查字幕
-    local subs_check_cmd="yt-dlp --cookies-from-browser edge --list-subs $proxy_args \"$VIDEO_URL\""
+    local subs_check_cmd="yt-dlp ${COOKIE_ARGS[*]} --list-subs $proxy_args \"$VIDEO_URL\""
     local subtitle_available=false
     
     if eval "$subs_check_cmd" 2>/dev/null | grep -E "(Language|Available subtitles)" >/dev/null; then
@@ -321,7 +519,7 @@ download_subtitle_with_edge() {
     # 执行字幕下载
     if [ "$use_proxy" = true ]; then
         yt-dlp \
-            --cookies-from-browser edge \
+            "${COOKIE_ARGS[@]}" \
             --write-subs \
             --write-auto-subs \
             --sub-langs "en,zh,zh-Hans,zh-CN,zh-TW" \
@@ -337,7 +535,7 @@ download_subtitle_with_edge() {
             "$VIDEO_URL" &
     else
         yt-dlp \
-            --cookies-from-browser edge \
+            "${COOKIE_ARGS[@]}" \
             --write-subs \
             --write-auto-subs \
             --sub-langs "en,zh,zh-Hans,zh-CN,zh-TW" \
@@ -453,7 +651,7 @@ download_with_edge() {
     # 使用macOS兼容的超时机制
     if [ "$use_proxy" = true ]; then
         yt-dlp \
-            --cookies-from-browser edge \
+            "${COOKIE_ARGS[@]}" \
             --format "$DOWNLOAD_FORMAT" \
             --output "${TARGET_FILENAME}.%(ext)s" \
             --no-playlist \
@@ -472,7 +670,7 @@ download_with_edge() {
             "$VIDEO_URL" &
     else
         yt-dlp \
-            --cookies-from-browser edge \
+            "${COOKIE_ARGS[@]}" \
             --format "$DOWNLOAD_FORMAT" \
             --output "${TARGET_FILENAME}.%(ext)s" \
             --no-playlist \
@@ -530,7 +728,7 @@ download_with_edge() {
         
         # 优先查找目标文件名模式
         for expected_file in "${EXPECTED_FILES[@]}"; do
-            if [ -f "$expected_file" ] && [ -s "$expected_file" ]; then
+            if verify_media "$expected_file"; then
                 DOWNLOADED_FILE="$expected_file"
                 echo "✅ 下载成功: $DOWNLOADED_FILE"
                 return 0
@@ -19,6 +19,7 @@ show_help() {
     echo "  -hd                   处理高清视频文件"
     echo "  -f, --force           强制重新处理所有步骤（忽略已有文件）"
     echo "  -srt input.srt        使用指定的SRT字幕文件"
+    echo "  -a, --audio FILE      使用指定的分离音频文件（如 getvideo.sh -split 输出的 AUDIO_FILE）"
     echo "  -h, --help            显示帮助信息"
     echo ""
     echo "断点续传说明:"
@@ -56,6 +57,7 @@ HD_MODE=false
 FORCE=false
 INPUT_VIDEO=""
 INPUT_SRT=""
+INPUT_AUDIO=""
 
 # 解析参数
 while [[ $# -gt 0 ]]; do
@@ -86,6 +88,10 @@ while [[ $# -gt 0 ]]; do
             #这里不使用这个参数
             shift 2
             ;;
+        -a|--audio)
+            INPUT_AUDIO="$2"
+            shift 2
+            ;;
         -h|--help)
             show_help
             exit 0
@@ -138,7 +144,10 @@ SEPARATE_AUDIO_FILE=""
 AUDIO_BASE_NAME=$(basename "${INPUT_VIDEO%.*}")
 
 # 改进的分离音频文件检测逻辑
-if [[ "$INPUT_VIDEO" == *"_video.webm" ]]; then
+if [ -n "$INPUT_AUDIO" ]; then
+    # 调用方直接给出了分离音频文件
+    SEPARATE_AUDIO_FILE="$INPUT_AUDIO"
+elif [[ "$INPUT_VIDEO" == *"_video.webm" ]]; then
     # 如果输入是普通分离视频文件，查找对应的音频文件
     AUDIO_BASE_NAME=$(basename "${INPUT_VIDEO%_video.webm}")
     SEPARATE_AUDIO_FILE="${AUDIO_BASE_NAME}_audio.webm"
@@ -278,9 +287,14 @@ if [ "$SKIP_WHISPER" = true ]; then
 else
     echo "步骤 2/2: 使用get_srt_by_wisper.py进行字幕提取..."
     
-    # 直接使用原视频文件作为输入
-    INPUT_FILE="$INPUT_VIDEO"
-    echo "  使用原视频文件: $INPUT_FILE"
+    # 优先使用已提取的音频（可能在下载阶段已提前提取），避免再次解码整个视频
+    if [ -f "$EXTRACTED_AUDIO" ] && [ -s "$EXTRACTED_AUDIO" ]; then
+        INPUT_FILE="$EXTRACTED_AUDIO"
+        echo "  使用已提取的音频文件: $INPUT_FILE"
+    else
+        INPUT_FILE="$INPUT_VIDEO"
+        echo "  使用原视频文件: $INPUT_FILE"
+    fi
     
     # 调用get_srt_by_wisper.py
     if [ "$LANGUAGE" = "auto" ]; then
@@ -15,6 +15,7 @@ SUBTITLE_FONT="AiDianFengYaHeiChangTi"  # 字幕字体
 DEFAULT_SUBTITLE_SIZE=15  # 默认字幕大小
 SATURATION=1.2           # 饱和度调整 (1.0=原始, >1.0增强, <1.0降低)
 CONCURRENT_JOBS=3        # 默认并行任务数
+CLEANUP_POLICY="lazy"    # 中间文件清理策略: keep, lazy, eager
 
 # --- 解析命令行参数 ---
 show_help() {
@@ -27,6 +28,7 @@ show_help() {
     echo "  -s, --speed RATE       设置语速倍数 (默认: 1.5)"
     echo "  --fsize SIZE           设置字幕字体大小 (默认: 15)"
     echo "  -hd                    处理高清视频文件"
+    echo "  --cleanup POLICY       中间文件清理策略: keep, lazy, eager (默认: lazy)"
     echo "  -h, --help             显示帮助信息"
     echo ""
     echo "视频文件输入说明:"
@@ -43,6 +45,7 @@ show_help() {
     echo "  $0 -v female.wav video.mp4              # 使用指定语音文件"
     echo "  $0 -s 2.0 video.mp4                     # 使用2倍语速"
     echo "  $0 --fsize 20 video.mp4                 # 使用20号字体大小"
+    echo "  $0 --cleanup eager video.mp4            # 完成后删除可快速重建的中间文件"
     echo "  $0 -c 8 -v male.wav -s 1.8 --fsize 18 -hd video_1751525030_5107  # 完整参数示例"
 }
 
@@ -99,6 +102,14 @@ while [[ $# -gt 0 ]]; do
             HD_MODE=true
             shift
             ;;
+        --cleanup)
+            CLEANUP_POLICY="$2"
+            if [[ ! "$CLEANUP_POLICY" =~ ^(keep|lazy|eager)$ ]]; then
+                echo "错误：清理策略必须是 keep、lazy 或 eager"
+                exit 1
+            fi
+            shift 2
+            ;;
         -h|--help)
             show_help
             exit 0
@@ -286,7 +297,7 @@ TRANSLATED_SRT="$TEMP_DIR/step3.5_translated.srt"
 if [ ! -f "$TRANSLATED_SRT" ]; then
     TRANSLATED_SRT="$TEMP_DIR/step3_optimized.srt"
 fi
-CHINESE_AUDIO="$TEMP_DIR/step5_chinese_audio.wav"
+CHINESE_AUDIO="$TEMP_DIR/step5_chinese_audio.flac"
 VIDEO_WITH_AUDIO="$TEMP_DIR/step6_with_audio.mp4"
 
 # 检查必要的文件是否存在
@@ -303,6 +314,10 @@ if [ ! -f "$TRANSLATED_SRT" ]; then
     exit 1
 fi
 
+# 记录临时目录初始状态，结束时统计本次运行的写入量
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+python3 "$SCRIPT_DIR/work_store.py" snapshot "$TEMP_DIR"
+
 echo "4步骤视频后处理开始: $INPUT_VIDEO"
 echo "实际使用的视频文件: $ACTUAL_VIDEO"
 if [ "$HD_MODE" = true ]; then
@@ -321,6 +336,7 @@ echo "使用并行任务数: $CONCURRENT_JOBS"
 echo "使用语音文件: $VOICE_FILE"
 echo "使用语速倍数: $SPEECH_RATE"
 echo "使用字幕字体大小: $SUBTITLE_SIZE"
+echo "中间文件清理策略: $CLEANUP_POLICY"
 echo "强制使用Apple Silicon GPU (MPS)"
 echo "=================================================="
 
@@ -345,8 +361,15 @@ from datetime import timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Lock
 
+sys.path.insert(0, '$SCRIPT_DIR')
+from work_store import SegmentStore, render_voice_track, record_writes
+
 print_lock = Lock()
 
+# 所有TTS片段写入同一个带索引的int16容器（写入时加锁），不再为每句保留单独的WAV
+temp_dir = '$TEMP_DIR'
+store = SegmentStore(temp_dir)
+
 def safe_print(*args, **kwargs):
     with print_lock:
         print(*args, **kwargs)
@@ -367,28 +390,27 @@ def generate_tts_segment(args):
     # 去掉句号，让朗读更自然
     text = text.replace('。', '')
     
-    # 生成单独的音频文件 (使用wav格式避免mp3格式问题)
-    audio_file = f'$TEMP_DIR/segment_{i+1:03d}.wav'
-    text_file = f'$TEMP_DIR/segment_{i+1:03d}.txt'
-    
-    # 写入文本文件
-    try:
-        with open(text_file, 'w', encoding='utf-8') as f:
-            f.write(text)
-    except Exception as e:
-        safe_print(f'   写入文本文件失败（片段{i+1}）: {str(e)}')
-        return None
+    # IndexTTS先输出单独的wav文件，写入容器后删除；容器索引中保存对应文本
+    key = f'segment_{i+1:03d}'
+    audio_file = f'$TEMP_DIR/{key}.wav'
     
-    # 检查音频文件是否已存在，如果存在则跳过IndexTTS生成
+    # 检查容器中是否已有相同文本的片段，如果存在则跳过IndexTTS生成
     try:
         tts_already_exists = os.path.exists(audio_file) and os.path.getsize(audio_file) > 0
     except Exception as e:
         safe_print(f'   检查文件失败（片段{i+1}）: {str(e)}')
         tts_already_exists = False
     
-    if tts_already_exists:
+    if store.has(key, text):
+        safe_print(f'✓ 跳过IndexTTS（片段{i+1}），容器中已存在 {key}')
+    elif tts_already_exists and not store.has(key):
+        # 容器中没有该片段时才沿用上次中断留下的wav
         safe_print(f'✓ 跳过IndexTTS（片段{i+1}），已存在 {audio_file}')
     else:
+        # 容器中该片段的文本已变化时，遗留的wav来自旧译文，删除后重新生成
+        if os.path.exists(audio_file):
+            os.remove(audio_file)
+        
         # IndexTTS重试机制：最多重试2次
         max_retries = 2
         retry_count = 0
@@ -475,7 +497,6 @@ def generate_tts_segment(args):
     
     # 设置MPS环境变量，强制使用Apple Silicon GPU
     import sys
-    import os
     
     # 尝试添加不同的index-tts路径到Python路径
     possible_paths = ['index-tts', '../index-tts']
@@ -487,48 +508,24 @@ def generate_tts_segment(args):
     os.environ['MPS_FALLBACK'] = '0'
     os.environ['PYTORCH_ENABLE_MPS_FALLBACK'] = '0'
     
-    # 第2步：生成加速版本（如果需要）
-    try:
-        file_exists = os.path.exists(audio_file) and os.path.getsize(audio_file) > 0
-    except Exception as e:
-        safe_print(f'   检查音频文件失败（片段{i+1}）: {str(e)}')
-        file_exists = False
-        
-    if file_exists:
-        # 生成加速版本的文件名
-        speed_audio_file = audio_file.replace('.wav', '_speed.wav')
-        safe_print(f'   正在生成{$SPEECH_RATE}倍速版本（片段{i+1}）: {speed_audio_file}')
-        
-        try:
-            # 使用ffmpeg调整语速，保持默认音量
-            speed_cmd = ['ffmpeg', '-i', audio_file, '-filter:a', f'atempo=$SPEECH_RATE', '-y', speed_audio_file]
-            speed_result = subprocess.run(speed_cmd, capture_output=True, text=True)
-            
-            if speed_result.returncode == 0 and os.path.exists(speed_audio_file) and os.path.getsize(speed_audio_file) > 0:
-                safe_print(f'   语速调整成功（片段{i+1}）: {speed_audio_file}')
-                # 更新audio_file指向加速版本，后续处理使用加速版本
-                audio_file = speed_audio_file
-            else:
-                safe_print(f'   语速调整失败（片段{i+1}），使用原速音频: {speed_result.stderr.strip() if speed_result.stderr else \"未知错误\"}')
-                # 如果语速调整失败，继续使用原速文件
-        except Exception as e:
-            safe_print(f'   ffmpeg命令执行失败（片段{i+1}）: {str(e)}')
-            # 如果ffmpeg失败，继续使用原速文件
-    
+    # 第2步：写入容器，语速调整在合成音轨时进行，不再生成 _speed.wav
     try:
-        if os.path.exists(audio_file) and os.path.getsize(audio_file) > 0:
-            safe_print(f'✓ 生成片段 {i+1}/{len(subs)}: {text[:50] + \"...\" if len(text) > 50 else text}')
-            return {
-                'file': audio_file,
-                'text': text,
-                'sub': sub,
-                'index': i
-            }
-        else:
-            safe_print(f'❌ 片段 {i+1} 生成失败: {text[:50] + \"...\" if len(text) > 50 else text}')
-            return None
+        transient = 0
+        if not store.has(key, text):
+            store.add_wav(key, audio_file, text)
+            if '$CLEANUP_POLICY' != 'keep':
+                transient = os.path.getsize(audio_file)
+                os.remove(audio_file)
+        safe_print(f'✓ 生成片段 {i+1}/{len(subs)}: {text[:50] + \"...\" if len(text) > 50 else text}')
+        return {
+            'key': key,
+            'text': text,
+            'sub': sub,
+            'index': i,
+            'transient': transient
+        }
     except Exception as e:
-        safe_print(f'❌ 片段 {i+1} 处理异常: {str(e)}')
+        safe_print(f'❌ 片段 {i+1} 写入容器失败: {str(e)}')
         return None
 
 # 并行执行TTS生成
@@ -572,22 +569,13 @@ safe_print(f'使用强化TTS音量: {standard_tts_volume:.1f} dB (标准音量
 # 分析原视频音量和所有TTS音频文件的音量
 safe_print(f'\\n使用TTS默认音量，不做任何调整')
 
+speech_rate = float('$SPEECH_RATE')
 audio_files = []
 for i, audio_info in enumerate(temp_audio_files):
     sub = audio_info['sub']
     
-    # 获取音频时长，增加错误处理
-    probe_cmd = ['ffprobe', '-v', 'quiet', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', audio_info['file']]
-    duration_result = subprocess.run(probe_cmd, capture_output=True, text=True)
-    duration = 0
-    if duration_result.stdout.strip():
-        try:
-            duration_str = duration_result.stdout.strip()
-            if duration_str != 'N/A' and duration_str != '':
-                duration = float(duration_str)
-        except ValueError:
-            safe_print(f'   警告：无法解析音频时长: {duration_result.stdout.strip()}，使用默认值0')
-            duration = 0
+    # 时长直接由容器索引计算，无需逐个ffprobe
+    duration = store.duration(audio_info['key']) / speech_rate
     
     # 计算字幕时间
     start_seconds = sub.start.total_seconds()
@@ -595,7 +583,7 @@ for i, audio_info in enumerate(temp_audio_files):
     subtitle_duration = end_seconds - start_seconds
     
     audio_files.append({
-        'file': audio_info['file'],
+        'key': audio_info['key'],
         'start': start_seconds,
         'end': end_seconds,
         'duration': duration,
@@ -627,124 +615,22 @@ if video_duration is None or video_duration <= 0:
     video_duration = max_end_time + 10  # 添加10秒缓冲
     safe_print(f'使用计算的音频时长: {video_duration:.1f}秒 (基于字幕最大结束时间 + 缓冲)')
 
-# 使用分批处理方法避免文件句柄过多的问题
-safe_print(f'\\n=== 使用分批处理合并TTS音频片段 ===')
-
-BATCH_SIZE = 100  # 每批处理100个音频文件
-total_files = len(audio_files)
-total_batches = (total_files + BATCH_SIZE - 1) // BATCH_SIZE
-
-safe_print(f'总音频片段: {total_files}')
-safe_print(f'分批大小: {BATCH_SIZE}')
-safe_print(f'总批次: {total_batches}')
-
-# 获取temp_dir路径
-temp_dir = '$TEMP_DIR'
-
-# 创建静音背景音轨
-silence_file = os.path.join(temp_dir, 'silence_base.wav')
-silence_cmd = f'ffmpeg -f lavfi -i anullsrc=channel_layout=stereo:sample_rate=44100:duration={video_duration} \"{silence_file}\" -y'
-safe_print(f'\\n创建静音背景音轨...')
-result = subprocess.run(silence_cmd, shell=True, capture_output=True, text=True)
-if result.returncode != 0:
-    safe_print(f'❌ 创建静音背景音轨失败: {result.stderr}')
+# 在内存映射的音轨上直接叠加所有片段，不再生成静音底轨和分批混音文件
+safe_print(f'\\n=== 叠加TTS音频片段并编码为FLAC ===')
+safe_print(f'总音频片段: {len(audio_files)}')
+
+final_audio_path = os.path.join(temp_dir, 'step5_chinese_audio.flac')
+placements = [(audio['key'], audio['start']) for audio in audio_files]
+try:
+    scratch_bytes = render_voice_track(store, placements, video_duration, final_audio_path, speech_rate,
+                                       jobs=$CONCURRENT_JOBS)
+except RuntimeError as e:
+    safe_print(f'❌ 音频合成失败: {e}')
     sys.exit(1)
-
-batch_files = []
-
-# 分批处理音频片段
-for batch_num in range(total_batches):
-    start_idx = batch_num * BATCH_SIZE
-    end_idx = min(start_idx + BATCH_SIZE, total_files)
-    batch_audio_files = audio_files[start_idx:end_idx]
-    
-    safe_print(f'\\n处理批次 {batch_num + 1}/{total_batches} (片段 {start_idx + 1}-{end_idx})')
-    
-    # 为当前批次创建filter_complex
-    filter_lines = []
-    input_files = []
-    
-    # 添加静音背景作为第一个输入
-    input_files.append(silence_file)
-    
-    # 添加当前批次的音频文件
-    for audio_info in batch_audio_files:
-        input_files.append(audio_info['file'])
-    
-    # 创建filter_complex
-    mix_inputs = ['[0:a]']  # 静音背景音轨
-    
-    for i, audio_info in enumerate(batch_audio_files):
-        delay_ms = int(audio_info['start'] * 1000)
-        filter_lines.append(f'[{i+1}:a]adelay={delay_ms}|{delay_ms}[delayed{i}];')
-        mix_inputs.append(f'[delayed{i}]')
-    
-    # 混合所有音频
-    mix_filter = ''.join(mix_inputs) + f'amix=inputs={len(mix_inputs)}:duration=first:normalize=0[out]'
-    filter_lines.append(mix_filter)
-    
-    # 生成批次输出文件
-    batch_output = os.path.join(temp_dir, f'batch_{batch_num:03d}_audio.wav')
-    batch_files.append(batch_output)
-    
-    # 构建ffmpeg命令
-    input_args = ' '.join([f'-i \"{file}\"' for file in input_files])
-    filter_complex = ''.join(filter_lines)
-    
-    ffmpeg_cmd = f'ffmpeg {input_args} -filter_complex \"{filter_complex}\" -map \"[out]\" \"{batch_output}\" -y'
-    
-    safe_print(f'  处理 {len(batch_audio_files)} 个音频片段...')
-    result = subprocess.run(ffmpeg_cmd, shell=True, capture_output=True, text=True)
-    
-    if result.returncode != 0:
-        safe_print(f'❌ 批次 {batch_num + 1} 处理失败: {result.stderr}')
-        sys.exit(1)
-    
-    safe_print(f'  ✓ 批次 {batch_num + 1} 处理完成')
-
-# 如果有多个批次，需要合并所有批次的结果
-if total_batches == 1:
-    # 只有一个批次，直接重命名
-    final_audio_path = os.path.join(temp_dir, 'step5_chinese_audio.wav')
-    os.rename(batch_files[0], final_audio_path)
-    safe_print(f'\\n✓ 单批次处理完成，音频文件: {final_audio_path}')
-else:
-    # 多个批次，需要合并
-    safe_print(f'\\n合并 {total_batches} 个批次的音频文件...')
-    
-    # 创建合并用的filter_complex
-    input_args = ' '.join([f'-i \"{file}\"' for file in batch_files])
-    mix_inputs = ''.join([f'[{i}:a]' for i in range(len(batch_files))])
-    filter_complex = f'{mix_inputs}amix=inputs={len(batch_files)}:duration=first:normalize=0[out]'
-    
-    final_audio_path = os.path.join(temp_dir, 'step5_chinese_audio.wav')
-    final_cmd = f'ffmpeg {input_args} -filter_complex \"{filter_complex}\" -map \"[out]\" \"{final_audio_path}\" -y'
-    
-    result = subprocess.run(final_cmd, shell=True, capture_output=True, text=True)
-    
-    if result.returncode != 0:
-        safe_print(f'❌ 最终合并失败: {result.stderr}')
-        sys.exit(1)
-    
-    safe_print(f'✓ 所有批次合并完成')
-    
-    # 清理批次文件
-    for batch_file in batch_files:
-        if os.path.exists(batch_file):
-            os.remove(batch_file)
-    safe_print(f'✓ 清理批次临时文件完成')
-
-# 清理静音背景文件
-if os.path.exists(silence_file):
-    os.remove(silence_file)
+record_writes(temp_dir, sum(audio['transient'] for audio in temp_audio_files) + scratch_bytes)
 
 safe_print(f'\\n✓ 音频合成完成: {final_audio_path}')
-
-# 保留所有临时音频文件用于调试
-safe_print(f'\\n保留的TTS音频片段文件:')
-for i, audio_info in enumerate(audio_files):
-    safe_print(f'  片段 {i+1:2d}: {audio_info[\"file\"]}')
-safe_print(f'\\n注意：临时音频文件已保留在 {os.path.dirname(audio_files[0][\"file\"])} 目录中')
+safe_print(f'TTS片段容器: {len(store)} 个片段，本次写入 {store.bytes_written / 1024 / 1024:.1f} MB')
 "
 
     if [ ! -f "$CHINESE_AUDIO" ]; then
@@ -761,8 +647,8 @@ fi
 if [ "$PRESERVE_BACKGROUND" = true ]; then
     echo "步骤 2/4: 分离人声和背景音，混合中文配音..."
     
-    # 从原视频或分离音频文件提取背景音乐
-    BACKGROUND_AUDIO="$TEMP_DIR/background_audio.wav"
+    # 从原视频或分离音频文件提取背景音乐（FLAC无损压缩，供断点续传复用）
+    BACKGROUND_AUDIO="$TEMP_DIR/background_audio.flac"
     
     # 检查背景音频文件是否已存在
     if [ -f "$BACKGROUND_AUDIO" ] && [ -s "$BACKGROUND_AUDIO" ]; then
@@ -802,7 +688,7 @@ if [ "$PRESERVE_BACKGROUND" = true ]; then
             ;;
         "original")
             echo "  使用原始音轨作为背景音..."
-            ffmpeg -i "$AUDIO_SOURCE" -vn -acodec pcm_s16le "$BACKGROUND_AUDIO" -y -hide_banner -loglevel error
+            ffmpeg -i "$AUDIO_SOURCE" -vn -c:a flac "$BACKGROUND_AUDIO" -y -hide_banner -loglevel error
             ;;
         "auto"|*)
             echo "  自动选择最佳人声分离方法..."
@@ -813,7 +699,7 @@ if [ "$PRESERVE_BACKGROUND" = true ]; then
             best_peak=-100
             
             for method in "${methods[@]}"; do
-                temp_audio="$TEMP_DIR/test_${method}.wav"
+                temp_audio="$TEMP_DIR/test_${method}.flac"
                 echo "    测试 $method 方法..."
                 
                 case "$method" in
@@ -846,7 +732,7 @@ if [ "$PRESERVE_BACKGROUND" = true ]; then
                 echo "  ✓ 选择 $best_method 方法（峰值: ${best_peak}dB）"
             else
                 echo "  所有方法都失败，使用原始音轨..."
-                ffmpeg -i "$AUDIO_SOURCE" -vn -acodec pcm_s16le -af "volume=0.8" "$BACKGROUND_AUDIO" -y -hide_banner -loglevel error
+                ffmpeg -i "$AUDIO_SOURCE" -vn -c:a flac -af "volume=0.8" "$BACKGROUND_AUDIO" -y -hide_banner -loglevel error
             fi
             ;;
     esac
@@ -861,7 +747,7 @@ if [ "$PRESERVE_BACKGROUND" = true ]; then
         
         # 混合背景音和中文配音，使用限制器避免破音
         echo "  混合背景音和中文配音（背景音:${BACKGROUND_VOLUME}, 配音:${VOICE_VOLUME}）..."
-        MIXED_AUDIO="$TEMP_DIR/mixed_audio.wav"
+        MIXED_AUDIO="$TEMP_DIR/mixed_audio.flac"
         
         # 检查混合音频文件是否已存在
         if [ -f "$MIXED_AUDIO" ] && [ -s "$MIXED_AUDIO" ]; then
@@ -923,6 +809,10 @@ fi
 
 echo "✓ 最终视频生成完成: $OUTPUT_VIDEO"
 
+# 按策略清理中间文件，并统计临时目录占用和本次写入量
+python3 "$SCRIPT_DIR/work_store.py" cleanup "$TEMP_DIR" --policy "$CLEANUP_POLICY"
+python3 "$SCRIPT_DIR/work_store.py" report "$TEMP_DIR"
+
 # 显示处理结果
 echo "=================================================="
 echo "✅ 第二阶段并行处理完成！"
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+字幕翻译精简载荷工具：只把编号后的字幕文本发给模型，序号和时间轴在本地还原
+使用方法:
+  python3 srt_payload.py split step2_whisper.srt translate_temp/     # 生成分批载荷
+  python3 srt_payload.py check payload_001.txt response_001.txt      # 检查条数是否一致
+  python3 srt_payload.py restore step2_whisper.srt translate_temp/ step3.5_translated.srt
+"""
+
+import re
+import sys
+import argparse
+from pathlib import Path
+from typing import List, Dict, Optional
+
+PAYLOAD_LINE = re.compile(r'^\s*(\d+)\s*[|｜]\s*(.*?)\s*$')
+
+
+def parse_cues(srt_content: str) -> List[Dict]:
+    """解析SRT，保留原始序号行和时间轴行"""
+    cues = []
+    for block in re.split(r'\n\s*\n+', srt_content.strip()):
+        lines = block.strip().split('\n')
+        if len(lines) >= 2 and '-->' in lines[1]:
+            cues.append({
+                'index': lines[0].strip(),
+                'timing': lines[1].strip(),
+                'text': ' '.join(line.strip() for line in lines[2:] if line.strip())
+            })
+    return cues
+
+
+def cue_block(cue: Dict, text: str) -> str:
+    return f"{cue['index']}\n{cue['timing']}\n{text}\n\n"
+
+
+def format_payload(cues: List[Dict], offset: int) -> str:
+    """生成“序号|原文”格式的载荷，序号从 offset+1 开始"""
+    return ''.join(f"{offset + i}|{cue['text']}\n" for i, cue in enumerate(cues, 1))
+
+
+def parse_payload(content: str) -> Dict[int, str]:
+    """解析“序号|文本”格式，忽略模型额外输出的说明行"""
+    entries = {}
+    for line in content.splitlines():
+        match = PAYLOAD_LINE.match(line)
+        if match:
+            entries[int(match.group(1))] = match.group(2)
+    return entries
+
+
+def check_parity(payload: str, response: str) -> Optional[str]:
+    """检查译文与原文条数、序号是否一致，返回失败原因，一致时返回None"""
+    expected = parse_payload(payload)
+    actual = parse_payload(response)
+    if not actual:
+        return "输出不包含“序号|译文”格式的行"
+    missing = sorted(set(expected) - set(actual))
+    extra = sorted(set(actual) - set(expected))
+    if missing or extra:
+        return f"条数不一致: 原文 {len(expected)} 条, 译文 {len(actual)} 条, 缺少 {missing[:5]}, 多出 {extra[:5]}"
+    empty = [n for n in expected if expected[n] and not actual[n]]
+    if empty:
+        return f"译文为空: {empty[:5]}"
+    return None
+
+
+def batch_number(path: Path) -> int:
+    match = re.search(r'_(\d+)\.txt$', path.name)
+    return int(match.group(1)) if match else 0
+
+
+def cmd_split(args) -> int:
+    """生成载荷批次；载荷内容未变的批次保留已有译文以便续传，
+    内容变化的批次删除旧译文，多出来的旧批次整体删除"""
+    cues = parse_cues(Path(args.srt).read_text(encoding='utf-8'))
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    batches = 0
+    for start in range(0, len(cues), args.batch_size):
+        batches += 1
+        payload = format_payload(cues[start:start + args.batch_size], start)
+        payload_file = out_dir / f"payload_{batches:03d}.txt"
+        if payload_file.exists() and payload_file.read_text(encoding='utf-8') == payload:
+            continue
+        (out_dir / f"response_{batches:03d}.txt").unlink(missing_ok=True)
+        payload_file.write_text(payload, encoding='utf-8')
+
+    # 原文变短时，上次运行留下的高序号批次会让还原时条数不一致
+    for stale in list(out_dir.glob('payload_*.txt')) + list(out_dir.glob('response_*.txt')):
+        if batch_number(stale) > batches:
+            stale.unlink()
+
+    print(batches)
+    return 0
+
+
+def cmd_check(args) -> int:
+    payload = Path(args.payload).read_text(encoding='utf-8')
+    response = Path(args.response).read_text(encoding='utf-8')
+    reason = check_parity(payload, response)
+    if reason:
+        print(reason)
+        return 1
+    return 0
+
+
+def cmd_restore(args) -> int:
+    source = Path(args.srt).read_text(encoding='utf-8')
+    cues = parse_cues(source)
+    work_dir = Path(args.work_dir)
+
+    translations = {}
+    payload_bytes = 0
+    response_bytes = 0
+    for payload_file in sorted(work_dir.glob('payload_*.txt')):
+        response_file = work_dir / payload_file.name.replace('payload_', 'response_')
+        if not response_file.exists():
+            print(f"❌ 缺少译文: {response_file.name}")
+            return 1
+        payload_bytes += payload_file.stat().st_size
+        response_bytes += response_file.stat().st_size
+        translations.update(parse_payload(response_file.read_text(encoding='utf-8')))
+
+    if len(translations) != len(cues):
+        print(f"❌ 条数不一致: 原文 {len(cues)} 条, 译文 {len(translations)} 条")
+        return 1
+
+    output = ''.join(cue_block(cue, translations[i]) for i, cue in enumerate(cues, 1))
+    Path(args.output).write_text(output, encoding='utf-8')
+
+    # 完整SRT模式下请求/响应都要携带序号和时间轴
+    full_request = len(''.join(cue_block(cue, cue['text']) for cue in cues).encode('utf-8'))
+    full_response = len(output.encode('utf-8'))
+    print(f"  ✅ 已还原 {len(cues)} 条字幕（序号与时间轴取自原文）")
+    print(f"  📉 请求载荷: {full_request} -> {payload_bytes} 字节 (减少 {reduction(full_request, payload_bytes):.1f}%)")
+    print(f"  📉 响应载荷: {full_response} -> {response_bytes} 字节 (减少 {reduction(full_response, response_bytes):.1f}%)")
+    return 0
+
+
+def reduction(before: int, after: int) -> float:
+    return 100 * (before - after) / before if before else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='字幕翻译精简载荷工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    split_parser = subparsers.add_parser('split', help='把SRT拆成“序号|原文”载荷批次')
+    split_parser.add_argument('srt', help='原始SRT文件')
+    split_parser.add_argument('out_dir', help='载荷输出目录')
+    split_parser.add_argument('-b', '--batch-size', type=int, default=25, help='每批字幕条数 (默认: 25)')
+    split_parser.set_defaults(func=cmd_split)
+
+    check_parser = subparsers.add_parser('check', help='检查译文条数与序号')
+    check_parser.add_argument('payload', help='载荷文件')
+    check_parser.add_argument('response', help='模型输出文件')
+    check_parser.set_defaults(func=cmd_check)
+
+    restore_parser = subparsers.add_parser('restore', help='用原文时间轴还原译文SRT')
+    restore_parser.add_argument('srt', help='原始SRT文件')
+    restore_parser.add_argument('work_dir', help='载荷与译文所在目录')
+    restore_parser.add_argument('output', help='输出SRT文件')
+    restore_parser.set_defaults(func=cmd_restore)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+分层字幕摘要：按token预算切分完整字幕，并发摘要各片段，最后汇总生成结果
+片段摘要按内容哈希缓存，换用不同的最终提示词重跑时只需重新执行汇总步骤
+使用方法: python3 srt_summarize.py input.srt --prompt "根据字幕生成文案" [-o output.md]
+"""
+
+import re
+import sys
+import shlex
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Optional
+
+from srt_payload import parse_cues
+
+DEFAULT_LLM_CMD = "claude --model claude-sonnet-4-20250514"
+MAP_PROMPT = "请用中文概括以下字幕片段的要点（不超过150字），保留专业术语、人名和关键数据，只输出要点："
+
+
+def log(message: str):
+    print(message, file=sys.stderr)
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算token数：中日韩字符按1个计，其余按每4个字符1个计"""
+    cjk_count = len(re.findall(r'[\u3040-\u30ff\u4e00-\u9fff\uac00-\ud7af]', text))
+    return cjk_count + (len(text) - cjk_count + 3) // 4
+
+
+def chunk_cues(cues: List[Dict], max_tokens: int) -> List[str]:
+    """按token预算把字幕文本切成片段，片段头部标注起止时间"""
+    chunks = []
+    lines = []
+    tokens = 0
+    start = None
+
+    def flush(end: str):
+        chunks.append(f"[{start} - {end}]\n" + '\n'.join(lines))
+
+    for cue in cues:
+        cue_tokens = estimate_tokens(cue['text'])
+        if lines and tokens + cue_tokens > max_tokens:
+            flush(previous_end)
+            lines, tokens, start = [], 0, None
+        if start is None:
+            start = cue['timing'].split('-->')[0].strip()
+        lines.append(cue['text'])
+        tokens += cue_tokens
+        previous_end = cue['timing'].split('-->')[-1].strip()
+
+    if lines:
+        flush(previous_end)
+    return chunks
+
+
+def run_llm(llm_cmd: str, prompt: str, content: str) -> str:
+    """调用LLM命令：提示词作为最后一个参数，内容通过标准输入传入"""
+    result = subprocess.run(shlex.split(llm_cmd) + [prompt], input=content, capture_output=True,
+                            text=True, encoding='utf-8', errors='replace')
+    if result.returncode != 0 or not result.stdout.strip():
+        error = result.stderr.strip().splitlines()[:1] or ["返回空结果"]
+        raise RuntimeError(f"LLM命令失败: {error[0]}")
+    return result.stdout.strip()
+
+
+class ChunkSummarizer:
+    """带内容哈希缓存的片段摘要器"""
+
+    def __init__(self, llm_cmd: str, cache_dir: Optional[Path], map_prompt: str = MAP_PROMPT):
+        self.llm_cmd = llm_cmd
+        self.cache_dir = cache_dir
+        self.map_prompt = map_prompt
+        self.cache_hits = 0
+
+    def cache_path(self, chunk: str) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        key = hashlib.sha256('\0'.join([self.llm_cmd, self.map_prompt, chunk]).encode('utf-8')).hexdigest()
+        return self.cache_dir / f"{key}.txt"
+
+    def summarize(self, chunk: str) -> str:
+        path = self.cache_path(chunk)
+        if path and path.exists():
+            self.cache_hits += 1
+            return path.read_text(encoding='utf-8')
+
+        summary = run_llm(self.llm_cmd, self.map_prompt, chunk)
+        if path:
+            # 先写临时文件再改名，并发或中断时不会留下半个缓存
+            tmp_path = path.with_suffix('.tmp')
+            tmp_path.write_text(summary, encoding='utf-8')
+            tmp_path.replace(path)
+        return summary
+
+
+def summarize_srt(srt_content: str, prompt: str, llm_cmd: str = DEFAULT_LLM_CMD,
+                  cache_dir: Optional[Path] = None, max_tokens: int = 3000, workers: int = 4) -> str:
+    """完整的分层摘要流程，返回最终汇总结果"""
+    cues = parse_cues(srt_content)
+    if not cues:
+        raise ValueError("字幕文件中没有有效条目")
+
+    chunks = chunk_cues(cues, max_tokens)
+    log(f"  📌 共 {len(cues)} 条字幕，按每片段约 {max_tokens} token 切分为 {len(chunks)} 个片段")
+
+    if len(chunks) == 1:
+        # 只有一个片段时直接用原文汇总，无需中间摘要
+        reduce_input = chunks[0]
+    else:
+        if cache_dir:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+        summarizer = ChunkSummarizer(llm_cmd, cache_dir)
+        log(f"  🔄 并发摘要各片段（{workers} 路）...")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            summaries = list(executor.map(summarizer.summarize, chunks))
+        log(f"  ✅ 片段摘要完成（缓存命中 {summarizer.cache_hits}/{len(chunks)}）")
+        reduce_input = '\n\n'.join(
+            f"片段 {i} {chunk.splitlines()[0]}\n{summary}"
+            for i, (chunk, summary) in enumerate(zip(chunks, summaries), 1)
+        )
+
+    log("  🔄 汇总生成最终结果...")
+    return run_llm(llm_cmd, prompt, reduce_input)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分层字幕摘要')
+    parser.add_argument('srt_file', help='输入SRT文件')
+    parser.add_argument('-p', '--prompt', required=True, help='最终汇总步骤的提示词')
+    parser.add_argument('-o', '--output', help='输出文件 (默认: 标准输出)')
+    parser.add_argument('--cache-dir', help='片段摘要缓存目录 (默认: 不缓存)')
+    parser.add_argument('--chunk-tokens', type=int, default=3000, help='每个片段的token预算 (默认: 3000)')
+    parser.add_argument('-j', '--workers', type=int, default=4, help='并发摘要数 (默认: 4)')
+    parser.add_argument('--llm-cmd', default=DEFAULT_LLM_CMD, help=f'LLM命令 (默认: {DEFAULT_LLM_CMD})')
+
+    args = parser.parse_args()
+
+    srt_content = Path(args.srt_file).read_text(encoding='utf-8')
+    cache_dir = Path(args.cache_dir) if args.cache_dir else None
+
+    try:
+        result = summarize_srt(srt_content, args.prompt, args.llm_cmd, cache_dir,
+                               args.chunk_tokens, args.workers)
+    except (RuntimeError, ValueError) as e:
+        log(f"  ❌ {e}")
+        sys.exit(1)
+
+    if args.output:
+        Path(args.output).write_text(result + '\n', encoding='utf-8')
+    else:
+        print(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+测试语言检测直接使用模型概率、不写任何临时文件
+"""
+
+import sys
+import types
+import wave
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+np = pytest.importorskip("numpy")
+
+from get_srt_by_wisper import SimpleDisplay, WhisperProcessor
+
+
+class FakeModel:
+    """只实现语言检测所需接口的模型"""
+
+    class dims:
+        n_mels = 80
+
+    device = 'cpu'
+
+    def __init__(self):
+        self.seen_samples = None
+
+    def detect_language(self, mel):
+        return None, {'en': 0.15, 'zh': 0.8, 'ja': 0.05}
+
+
+def make_fake_whisper(model):
+    fake = types.ModuleType('whisper')
+    fake.audio = types.SimpleNamespace(SAMPLE_RATE=16000)
+    fake.load_model = lambda name: model
+
+    def pad_or_trim(audio):
+        model.seen_samples = len(audio)
+        return audio
+
+    fake.pad_or_trim = pad_or_trim
+    fake.log_mel_spectrogram = lambda audio, n_mels: types.SimpleNamespace(to=lambda device: audio)
+    return fake
+
+
+def test_detect_language_returns_confidence(tmp_path, monkeypatch):
+    """返回概率最高的语言和置信度，且只读取前30秒"""
+    audio_path = tmp_path / 'audio.wav'
+    with wave.open(str(audio_path), 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(b'\x00\x00' * 16000 * 45)
+
+    model = FakeModel()
+    monkeypatch.setitem(sys.modules, 'whisper', make_fake_whisper(model))
+
+    processor = WhisperProcessor(SimpleDisplay())
+    language, confidence = processor.detect_language(str(audio_path))
+
+    assert language == 'zh'
+    assert confidence == pytest.approx(0.8)
+    assert model.seen_samples == 16000 * 30
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['audio.wav']
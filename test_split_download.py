@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+测试 getvideo.sh 的分离下载：本地HTTP服务器提供生成的DASH媒体，
+视频流和音频流并行下载、ffprobe校验，并提前提取第一阶段音频；
+以及 download_and_process.sh 第一步用分离下载为第一阶段提供音频
+"""
+
+import functools
+import os
+import shutil
+import subprocess
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent
+
+pytestmark = pytest.mark.skipif(
+    not all(shutil.which(tool) for tool in ('yt-dlp', 'ffmpeg', 'ffprobe')),
+    reason='需要 yt-dlp、ffmpeg 和 ffprobe',
+)
+
+
+def make_dash(media_dir: Path):
+    """生成带独立视频流和音频流的DASH清单"""
+    subprocess.run([
+        'ffmpeg', '-v', 'error',
+        '-f', 'lavfi', '-i', 'testsrc=duration=3:size=1280x720:rate=10',
+        '-f', 'lavfi', '-i', 'sine=duration=3',
+        '-map', '0:v', '-map', '1:a', '-c:v', 'libx264', '-c:a', 'aac',
+        '-f', 'dash', str(media_dir / 'manifest.mpd'),
+    ], check=True)
+
+
+@pytest.fixture
+def media_server(tmp_path):
+    media_dir = tmp_path / 'media'
+    media_dir.mkdir()
+    make_dash(media_dir)
+
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=str(media_dir))
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/manifest.mpd"
+    server.shutdown()
+
+
+def run_getvideo(work_dir: Path, url: str):
+    env = dict(os.environ, YTDLP_COOKIES_BROWSER='')
+    return subprocess.run(
+        ['bash', str(project_root / 'getvideo.sh'), '-hd', '-split', '-o', 'clip', url],
+        cwd=work_dir, env=env, capture_output=True, text=True, timeout=300,
+    )
+
+
+def test_split_download(tmp_path, media_server):
+    work_dir = tmp_path / 'work'
+    work_dir.mkdir()
+
+    result = run_getvideo(work_dir, media_server)
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    lines = result.stdout.splitlines()
+    video_file = next(l for l in lines if l.startswith('DOWNLOADED_FILE:')).split(':', 1)[1]
+    audio_file = next(l for l in lines if l.startswith('AUDIO_FILE:')).split(':', 1)[1]
+    assert video_file.startswith('clip_hd_video.')
+    assert audio_file.startswith('clip_hd_audio.')
+    assert (work_dir / 'clip_temp' / 'original_audio.wav').stat().st_size > 0
+
+    # 再次运行：已完成且校验通过的文件直接跳过
+    result = run_getvideo(work_dir, media_server)
+    assert result.returncode == 0
+    assert result.stdout.count('已存在且校验通过') == 2
+
+    # 损坏的文件无法通过ffprobe校验，会被重新下载
+    (work_dir / video_file).write_bytes(b'not a media file')
+    result = run_getvideo(work_dir, media_server)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert '[视频] 已有文件校验失败，删除后重新下载' in result.stdout
+    assert '[视频] 下载完成，ffprobe校验通过' in result.stdout
+    assert '[视频] 尝试 2/3' not in result.stdout
+
+
+def test_pipeline_feeds_part1_from_split_download(tmp_path, media_server):
+    """第一步分离下载后合并为普通视频，第一阶段拿到分离音频和已提取的WAV"""
+    script_dir = tmp_path / 'scripts'
+    script_dir.mkdir()
+    for name in ('download_and_process.sh', 'getvideo.sh', 'translate_by_claude.sh',
+                 'genmarkdown_by_claude.sh', 'process_video_part2.sh'):
+        shutil.copy(project_root / name, script_dir / name)
+    shutil.copytree(project_root / 'utils', script_dir / 'utils')
+    # 第一阶段只记录参数，然后失败以结束流程
+    part1 = script_dir / 'process_video_part1.sh'
+    part1.write_text('#!/bin/bash\necho "$@" > part1_args.txt\nexit 1\n')
+    part1.chmod(0o755)
+
+    work_dir = tmp_path / 'work'
+    work_dir.mkdir()
+    env = dict(os.environ, YTDLP_COOKIES_BROWSER='')
+    result = subprocess.run(
+        ['bash', str(script_dir / 'download_and_process.sh'), '-o', 'clip', media_server],
+        cwd=work_dir, env=env, capture_output=True, text=True, timeout=300,
+    )
+    assert result.returncode == 1, result.stdout + result.stderr
+
+    args = (work_dir / 'part1_args.txt').read_text().split()
+    video, audio = args[-1], args[args.index('-a') + 1]
+    assert video.startswith('clip.') and audio.startswith('clip_audio.')
+    assert (work_dir / 'clip_temp' / 'original_audio.wav').stat().st_size > 0
+
+    info = subprocess.run(['ffmpeg', '-hide_banner', '-i', str(work_dir / video)],
+                          capture_output=True, text=True).stderr
+    assert 'Video:' in info and 'Audio:' in info
+
+    # 第一阶段失败时保留分离文件；合并后的视频已存在时不再下载
+    assert (work_dir / audio).exists()
+    result = run_getvideo_plain(work_dir, media_server)
+    assert f'DOWNLOADED_FILE:{video}' in result.stdout
+    assert '跳过下载' in result.stdout
+
+
+def run_getvideo_plain(work_dir: Path, url: str):
+    env = dict(os.environ, YTDLP_COOKIES_BROWSER='')
+    return subprocess.run(
+        ['bash', str(project_root / 'getvideo.sh'), '-split', '-o', 'clip', url],
+        cwd=work_dir, env=env, capture_output=True, text=True, timeout=300,
+    )
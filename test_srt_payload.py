@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+测试精简翻译载荷：只发送文本，时间轴在本地还原
+"""
+
+import sys
+from argparse import Namespace
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from srt_payload import check_parity, cmd_restore, cmd_split, parse_cues
+
+
+def test_roundtrip_restores_timings(tmp_path, capsys):
+    """译文按序号还原后，序号和时间轴与原文完全一致"""
+    source = project_root / 'tedx.en.srt'
+    cmd_split(Namespace(srt=str(source), out_dir=str(tmp_path), batch_size=25))
+
+    for payload_file in sorted(tmp_path.glob('payload_*.txt')):
+        response = payload_file.read_text(encoding='utf-8').replace('|', '| 译 ')
+        (tmp_path / payload_file.name.replace('payload_', 'response_')).write_text(response, encoding='utf-8')
+
+    output = tmp_path / 'translated.srt'
+    assert cmd_restore(Namespace(srt=str(source), work_dir=str(tmp_path), output=str(output))) == 0
+
+    original = parse_cues(source.read_text(encoding='utf-8'))
+    translated = parse_cues(output.read_text(encoding='utf-8'))
+    assert [(c['index'], c['timing']) for c in translated] == [(c['index'], c['timing']) for c in original]
+    assert all(t['text'] == '译 ' + o['text'] for t, o in zip(translated, original))
+    assert '减少' in capsys.readouterr().out
+
+
+def test_check_parity():
+    payload = "1|Hello\n2|World\n"
+    assert check_parity(payload, "好的，翻译如下：\n1|你好\n2|世界\n") is None
+    assert '条数不一致' in check_parity(payload, "1|你好\n")
+    assert '译文为空' in check_parity(payload, "1|你好\n2|\n")
+
+
+def test_split_discards_stale_batches(tmp_path, capsys):
+    """重新拆分时只保留载荷未变批次的译文，删除内容变化和多出来的旧批次"""
+    def write_srt(path, texts):
+        path.write_text(''.join(f"{i}\n00:00:{i:02d},000 --> 00:00:{i:02d},500\n{text}\n\n"
+                                for i, text in enumerate(texts, 1)), encoding='utf-8')
+
+    def respond():
+        for payload_file in tmp_path.glob('payload_*.txt'):
+            response_file = tmp_path / payload_file.name.replace('payload_', 'response_')
+            if not response_file.exists():
+                response_file.write_text(payload_file.read_text(encoding='utf-8'), encoding='utf-8')
+
+    source = tmp_path / 'source.srt'
+    write_srt(source, ['a', 'b', 'c', 'd', 'e'])
+    cmd_split(Namespace(srt=str(source), out_dir=str(tmp_path), batch_size=2))
+    respond()
+    first_response = (tmp_path / 'response_001.txt').read_text(encoding='utf-8')
+
+    # 重新识别后原文变短，且第二批内容变化
+    write_srt(source, ['a', 'b', 'x'])
+    cmd_split(Namespace(srt=str(source), out_dir=str(tmp_path), batch_size=2))
+    assert sorted(p.name for p in tmp_path.glob('*_*.txt')) == ['payload_001.txt', 'payload_002.txt', 'response_001.txt']
+    assert (tmp_path / 'response_001.txt').read_text(encoding='utf-8') == first_response
+
+    respond()
+    output = tmp_path / 'translated.srt'
+    assert cmd_restore(Namespace(srt=str(source), work_dir=str(tmp_path), output=str(output))) == 0
+    assert [c['text'] for c in parse_cues(output.read_text(encoding='utf-8'))] == ['a', 'b', 'x']
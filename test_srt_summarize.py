@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+测试分层字幕摘要：用本地桩命令代替LLM，检查分片、缓存和汇总
+"""
+
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from srt_summarize import chunk_cues, estimate_tokens, summarize_srt
+from srt_payload import parse_cues
+
+STUB = '''import sys
+prompt = sys.argv[-1]
+content = sys.stdin.read()
+with open(sys.argv[1], 'a', encoding='utf-8') as log:
+    log.write(('reduce' if prompt.startswith('FINAL') else 'map') + '\\n')
+if prompt.startswith('FINAL'):
+    print('# ' + prompt + '\\n' + str(content.count('片段 ')))
+else:
+    print('摘要: ' + content.splitlines()[0])
+'''
+
+
+def make_stub(tmp_path: Path):
+    stub = tmp_path / 'stub_llm.py'
+    stub.write_text(STUB, encoding='utf-8')
+    calls = tmp_path / 'calls.log'
+    return f"{sys.executable} {stub} {calls}", calls
+
+
+def test_chunks_cover_whole_transcript():
+    """分片覆盖全部字幕且不超过token预算"""
+    cues = parse_cues((project_root / 'tedx.zh-Hans.srt').read_text(encoding='utf-8'))
+    chunks = chunk_cues(cues, 500)
+    assert len(chunks) > 1
+    assert sum(len(chunk.splitlines()) - 1 for chunk in chunks) == len(cues)
+    assert all(estimate_tokens('\n'.join(chunk.splitlines()[1:])) <= 500 + 100 for chunk in chunks)
+
+
+def test_cached_chunks_only_rerun_reduce(tmp_path):
+    """换提示词重跑时片段摘要全部命中缓存，只执行汇总"""
+    llm_cmd, calls = make_stub(tmp_path)
+    srt_content = (project_root / 'tedx.zh-Hans.srt').read_text(encoding='utf-8')
+    cache_dir = tmp_path / 'cache'
+
+    result = summarize_srt(srt_content, 'FINAL 文案A', llm_cmd, cache_dir, max_tokens=500)
+    chunk_count = len(chunk_cues(parse_cues(srt_content), 500))
+    assert result.startswith('# FINAL 文案A')
+    assert result.splitlines()[1] == str(chunk_count)
+    assert calls.read_text().splitlines().count('map') == chunk_count
+
+    calls.write_text('')
+    result = summarize_srt(srt_content, 'FINAL 文案B', llm_cmd, cache_dir, max_tokens=500)
+    assert result.startswith('# FINAL 文案B')
+    assert calls.read_text().splitlines() == ['reduce']
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+测试流式字幕优化与批处理结果一致
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from get_srt_by_wisper import SimpleDisplay, SubtitleOptimizer, WhisperProcessor, follow_lines
+
+
+def test_stream_matches_batch():
+    """流式优化在自带SRT样例上与批处理逐字节一致"""
+    srt_files = sorted(project_root.glob('*.srt'))
+    assert srt_files
+
+    for srt_file in srt_files:
+        optimizer = SubtitleOptimizer(SimpleDisplay())
+        batch = optimizer.optimize_subtitle(srt_file.read_text(encoding='utf-8'))
+        with open(srt_file, 'r', encoding='utf-8') as f:
+            stream = ''.join(optimizer.optimize_stream(optimizer.iter_srt_cues(f)))
+        assert stream == batch, srt_file.name
+
+
+def srt_to_verbose(srt_content: str) -> str:
+    """把Whisper生成的SRT还原为它在 --verbose 下打印的段落行"""
+    lines = ['Detecting language using up to the first 30 seconds.']
+    for block in re.split(r'\n\s*\n', srt_content.strip()):
+        block_lines = block.split('\n')
+        start, end = (t.strip().replace(',', '.') for t in block_lines[1].split('-->'))
+        start, end = (t[3:] if t.startswith('00:') else t for t in (start, end))
+        lines.append(f"[{start} --> {end}]  {' '.join(block_lines[2:])}")
+    return '\n'.join(lines) + '\n'
+
+
+def test_verbose_stream_matches_batch():
+    """解析Whisper逐段输出的流式结果与读取其SRT文件的批处理结果逐字节一致"""
+    for srt_file in sorted(project_root.glob('*.srt')):
+        srt_content = srt_file.read_text(encoding='utf-8')
+        if any(len(block.strip().split('\n')) > 3 for block in re.split(r'\n\s*\n', srt_content.strip())):
+            continue  # Whisper的SRT每段只有一行文本
+        optimizer = SubtitleOptimizer(SimpleDisplay())
+        batch = optimizer.optimize_subtitle(srt_content)
+        verbose_lines = srt_to_verbose(srt_content).splitlines(keepends=True)
+        stream = ''.join(optimizer.optimize_stream(optimizer.iter_verbose_cues(verbose_lines)))
+        assert stream == batch, srt_file.name
+
+
+FAKE_WHISPER = """#!{python}
+import os, sys, time
+print('[00:00.000 --> 00:01.500]  第一段')
+print('[00:01.500 --> 00:03.000]  第二段')
+# 等测试拿到第一段后才结束，若输出被缓冲到进程退出则超时
+deadline = time.time() + 5
+while not os.path.exists({marker!r}) and time.time() < deadline:
+    time.sleep(0.01)
+print('[00:03.000 --> 00:04.000]  第三段')
+"""
+
+
+def test_stream_cjk_yields_while_whisper_runs(tmp_path, monkeypatch):
+    """Whisper仍在运行时就能拿到已识别的段落"""
+    marker = tmp_path / 'got_first_cue'
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    fake = bin_dir / 'whisper'
+    fake.write_text(FAKE_WHISPER.format(python=sys.executable, marker=str(marker)), encoding='utf-8')
+    fake.chmod(0o755)
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    display = SimpleDisplay()
+    cues = SubtitleOptimizer(display).iter_verbose_cues(
+        WhisperProcessor(display).stream_cjk('audio.wav', 'zh', str(tmp_path)))
+    start = time.time()
+    first = next(cues)
+    assert time.time() - start < 3
+    assert first == {'start': 0.0, 'end': 1.5, 'text': '第一段'}
+    marker.touch()
+    assert [cue['text'] for cue in cues] == ['第二段', '第三段']
+
+
+def make_word_segments(text: str):
+    """按固定节奏为每个词生成时间戳，每8个词一个Whisper段落"""
+    words = [{'word': ' ' + word, 'start': round(i * 0.7, 3), 'end': round(i * 0.7 + 0.45, 3)}
+             for i, word in enumerate(text.split())]
+    return [{'words': words[i:i + 8]} for i in range(0, len(words), 8)]
+
+
+def parse_srt_text(srt_content: str) -> str:
+    optimizer = SubtitleOptimizer(SimpleDisplay())
+    return ' '.join(seg['text'] for seg in optimizer.parse_srt(srt_content))
+
+
+def test_word_stream_matches_batch(tmp_path):
+    """词级时间戳JSON：流式与 json_to_srt + 批处理优化结果一致"""
+    english = parse_srt_text((project_root / 'tedx.en.srt').read_text(encoding='utf-8'))
+    for text in ['It costs 3.5 dollars. Mr. Smith said hello. Yes!', english]:
+        segments = make_word_segments(text)
+        json_path = tmp_path / 'audio.json'
+        json_path.write_text(json.dumps({'segments': segments}), encoding='utf-8')
+
+        display = SimpleDisplay()
+        whisper = WhisperProcessor(display)
+        optimizer = SubtitleOptimizer(display)
+        batch = optimizer.optimize_subtitle(whisper.json_to_srt(str(json_path)))
+        stream = ''.join(optimizer.optimize_stream(optimizer.quantize_stream(whisper.iter_sentences(segments))))
+        assert stream == batch
+
+
+def test_word_stream_requires_word_timestamps():
+    """没有词级时间戳时流式和批处理一样报错"""
+    whisper = WhisperProcessor(SimpleDisplay())
+    with pytest.raises(ValueError, match='未找到词级时间戳'):
+        list(whisper.iter_sentences([{'text': 'no words here'}]))
+
+
+def test_follow_lines_reads_growing_file(tmp_path):
+    """边写边读：写入结束后读完剩余内容"""
+    path = tmp_path / 'live.srt'
+    done = threading.Event()
+
+    def writer():
+        with open(path, 'w', encoding='utf-8') as f:
+            for i in range(1, 4):
+                f.write(f"{i}\n00:00:0{i},000 --> 00:00:0{i},900\nline number {i} here\n\n")
+                f.flush()
+                time.sleep(0.02)
+        done.set()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    optimizer = SubtitleOptimizer(SimpleDisplay())
+    cues = list(optimizer.iter_srt_cues(follow_lines(str(path), done.is_set, poll_interval=0.01)))
+    thread.join()
+
+    assert [cue['index'] for cue in cues] == [1, 2, 3]
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+测试依赖检查：查找结果的跨进程缓存和 whisper 模块检查
+"""
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+import get_srt_by_wisper
+from get_srt_by_wisper import find_tool, load_tool_cache
+
+
+def new_process():
+    """模拟新进程：清空进程内缓存"""
+    find_tool.cache_clear()
+    load_tool_cache.cache_clear()
+
+
+def test_lookup_persists_across_runs(tmp_path, monkeypatch):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    tool = bin_dir / 'whisper'
+    tool.write_text('#!/bin/sh\n')
+    tool.chmod(0o755)
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setattr(get_srt_by_wisper, 'TOOL_CACHE_FILE', tmp_path / 'cache' / 'tools.txt')
+    new_process()
+
+    assert find_tool('whisper') == str(tool)
+    assert find_tool('no-such-tool-xyz') is None
+
+    # 下一次运行直接使用缓存，不再搜索PATH
+    new_process()
+    monkeypatch.setattr(shutil, 'which', lambda name: None)
+    assert find_tool('whisper') == str(tool)
+    assert 'no-such-tool-xyz' not in load_tool_cache()
+
+    # 缓存的路径失效后重新查找
+    new_process()
+    tool.unlink()
+    assert find_tool('whisper') is None
+
+    # PATH变化时缓存整体失效
+    new_process()
+    monkeypatch.setenv('PATH', str(bin_dir))
+    assert load_tool_cache() == {}
+    new_process()
+
+
+def test_auto_language_without_whisper_module(tmp_path, monkeypatch, capsys):
+    """只有 whisper 命令没有 Python 模块时，-l auto 给出警告，跳过语言检测继续处理"""
+    video = tmp_path / 'video.mp4'
+    video.write_bytes(b'')
+    monkeypatch.setattr(get_srt_by_wisper, 'check_dependencies', lambda: [])
+    monkeypatch.setattr(get_srt_by_wisper, 'has_whisper_module', lambda: False)
+    monkeypatch.setattr(get_srt_by_wisper.WhisperProcessor, 'extract_audio', lambda *args: True)
+    monkeypatch.setattr(get_srt_by_wisper.WhisperProcessor, 'detect_language',
+                        lambda *args: pytest.fail('不应检测语言'))
+    languages = []
+
+    def fake_transcribe(self, audio_path, language, output_dir):
+        languages.append(language)
+        raise RuntimeError('停止')
+
+    monkeypatch.setattr(get_srt_by_wisper.WhisperProcessor, 'transcribe_standard', fake_transcribe)
+    monkeypatch.setattr(sys, 'argv', ['get_srt_by_wisper.py', str(video)])
+    with pytest.raises(SystemExit):
+        get_srt_by_wisper.main()
+    assert languages == [None]
+    assert 'whisper Python 模块' in capsys.readouterr().out
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+测试临时目录紧凑存储：片段容器读写、清理策略和写入量统计
+"""
+
+import shutil
+import subprocess
+import sys
+import wave
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+import work_store
+from work_store import INDEX_FILE, SegmentStore, atempo_filter, cleanup, render_voice_track, report, snapshot
+
+
+def write_wav(path: Path, samples, rate=24000):
+    with wave.open(str(path), 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.asarray(samples, dtype='<i2').tobytes())
+
+
+def test_store_roundtrip(tmp_path):
+    """片段写入同一个容器，重新打开后按索引内存映射读回"""
+    store = SegmentStore(tmp_path)
+    for n in range(1, 4):
+        write_wav(tmp_path / f'segment_{n:03d}.wav', np.arange(n * 100) % 1000)
+        store.add_wav(f'segment_{n:03d}', tmp_path / f'segment_{n:03d}.wav', f'文本{n}')
+
+    # 中断时写了一半的索引行会被忽略
+    with open(tmp_path / INDEX_FILE, 'a', encoding='utf-8') as index:
+        index.write('{"key": "segment_004", "off')
+
+    reopened = SegmentStore(tmp_path)
+    assert len(reopened) == 3
+    assert reopened.has('segment_002', '文本2')
+    assert not reopened.has('segment_002', '改过的文本')
+    assert reopened.duration('segment_003') == 300 / 24000
+    assert reopened.samples('segment_002')[:, 0].tolist() == list(range(200))
+
+
+def test_atempo_filter_chains_out_of_range_speeds():
+    """超出单个atempo范围的语速拆成多个串联，乘积不变"""
+    assert atempo_filter(1.0) == 'anull'
+    assert atempo_filter(1.5) == 'atempo=1.5'
+    assert atempo_filter(3.0) == 'atempo=2,atempo=1.5'
+    assert atempo_filter(0.3) == 'atempo=0.5,atempo=0.6'
+    with pytest.raises(ValueError):
+        atempo_filter(0)
+
+
+def test_render_falls_back_to_original_speed(tmp_path, monkeypatch, capsys):
+    """某个片段语速调整失败时只有该片段使用原速音频，不中断整条音轨"""
+    store = SegmentStore(tmp_path)
+    write_wav(tmp_path / 'a.wav', np.arange(100), rate=44100)
+    store.add_wav('segment_001', tmp_path / 'a.wav')
+    filters = []
+
+    def fake_ffmpeg(cmd, input=None, capture_output=False):
+        audio_filter = cmd[cmd.index('-filter:a') + 1]
+        filters.append(audio_filter)
+        if audio_filter.startswith('atempo'):
+            return subprocess.CompletedProcess(cmd, 1, b'', b'Invalid argument')
+        mono = np.frombuffer(input, dtype='<i2')
+        return subprocess.CompletedProcess(cmd, 0, np.repeat(mono, 2).tobytes(), b'')
+
+    monkeypatch.setattr(work_store.subprocess, 'run', fake_ffmpeg)
+    pcm = store.render('segment_001', 1.5)
+    assert filters == ['atempo=1.5', 'anull']
+    assert pcm[:, 1].tolist() == list(range(100))
+    assert '语速调整失败，使用原速音频' in capsys.readouterr().out
+
+
+def test_cleanup_policies(tmp_path):
+    """lazy只删除已入库的片段和中间文件，eager另外删除可重建的音轨"""
+    write_wav(tmp_path / 'segment_001.wav', [1, 2, 3])
+    write_wav(tmp_path / 'segment_002.wav', [4, 5, 6])
+    SegmentStore(tmp_path).add_wav('segment_001', tmp_path / 'segment_001.wav')
+    for name in ('segment_001_speed.wav', 'silence_base.wav', 'batch_000_audio.wav',
+                 'background_audio.flac', 'step5_chinese_audio.flac'):
+        (tmp_path / name).write_bytes(b'x')
+
+    assert cleanup(tmp_path, 'keep') == []
+    removed = {path.name for path in cleanup(tmp_path, 'lazy')}
+    assert removed == {'segment_001.wav', 'segment_001_speed.wav', 'silence_base.wav', 'batch_000_audio.wav'}
+    assert (tmp_path / 'segment_002.wav').exists()
+
+    removed = {path.name for path in cleanup(tmp_path, 'eager')}
+    assert removed == {'background_audio.flac'}
+    assert (tmp_path / 'step5_chinese_audio.flac').exists()
+
+
+def test_report_counts_only_new_writes(tmp_path):
+    """追加写入的容器只统计本次增长的部分"""
+    store = SegmentStore(tmp_path)
+    write_wav(tmp_path / 'a.wav', np.zeros(1000))
+    store.add_wav('segment_001', tmp_path / 'a.wav')
+    (tmp_path / 'a.wav').unlink()
+    snapshot(tmp_path)
+
+    write_wav(tmp_path / 'b.wav', np.zeros(500))
+    SegmentStore(tmp_path).add_wav('segment_002', tmp_path / 'b.wav')
+    (tmp_path / 'b.wav').unlink()
+
+    text = report(tmp_path)
+    assert '临时目录占用' in text
+    written = float(text.split('本次运行写入: ')[1].split(' MB')[0])
+    assert written == pytest.approx(1000 / 1024 / 1024, abs=0.05)
+
+
+@pytest.mark.skipif(not shutil.which('ffmpeg'), reason='需要 ffmpeg')
+def test_render_voice_track(tmp_path):
+    """片段按起始时间叠加，重叠部分相加并限幅，输出FLAC"""
+    store = SegmentStore(tmp_path)
+    write_wav(tmp_path / 'loud.wav', np.full(44100, 30000), rate=44100)
+    store.add_wav('segment_001', tmp_path / 'loud.wav')
+    store.add_wav('segment_002', tmp_path / 'loud.wav')
+
+    output = tmp_path / 'voice.flac'
+    scratch_bytes = render_voice_track(store, [('segment_001', 0.0), ('segment_002', 0.5)], 2.0, output)
+    assert scratch_bytes == 2 * 44100 * 2 * 2
+    assert list(tmp_path.glob('*.part*')) == []
+
+    pcm = subprocess.run(['ffmpeg', '-v', 'error', '-i', str(output), '-f', 's16le', '-'],
+                         capture_output=True, check=True).stdout
+    track = np.frombuffer(pcm, dtype='<i2').reshape(-1, 2)
+    assert len(track) == 2 * 44100
+    # 单声道片段上混为立体声（与原来amix的自动格式转换一致），重叠部分超出范围时限幅
+    single = int(track[1000, 0])
+    assert single == track[1000, 1] > 20000
+    assert track[30000, 0] == 32767
+    assert track[80000, 1] == 0
+
+
+@pytest.mark.skipif(not shutil.which('ffmpeg'), reason='需要 ffmpeg')
+def test_render_voice_track_parallel_matches_serial(tmp_path):
+    """并行转换片段后按顺序叠加，结果与逐个转换完全一致"""
+    store = SegmentStore(tmp_path)
+    rng = np.random.default_rng(0)
+    placements = []
+    for n in range(1, 9):
+        write_wav(tmp_path / 'seg.wav', rng.integers(-20000, 20000, 2400 * n), rate=24000)
+        store.add_wav(f'segment_{n:03d}', tmp_path / 'seg.wav')
+        placements.append((f'segment_{n:03d}', 0.3 * n))
+
+    tracks = []
+    for jobs in (1, 4):
+        output = tmp_path / f'voice_{jobs}.flac'
+        render_voice_track(store, placements, 4.0, output, speed=1.5, jobs=jobs)
+        tracks.append(subprocess.run(['ffmpeg', '-v', 'error', '-i', str(output), '-f', 's16le', '-'],
+                                     capture_output=True, check=True).stdout)
+    assert tracks[0] == tracks[1]
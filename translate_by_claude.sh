@@ -10,6 +10,7 @@ show_help() {
     echo "选项:"
     echo "  --olang LANG          设置翻译目标语言 (默认: zh)"
     echo "  -p, --prompt TEXT     添加自定义prompt到翻译指令末尾"
+    echo "  -t, --text-only       精简载荷模式：只发送编号字幕文本，序号和时间轴在本地还原"
     echo "  -h, --help            显示帮助信息"
     echo ""
     echo "说明:"
@@ -32,12 +33,14 @@ show_help() {
     echo "  $0 --olang en video.mp4              # 翻译为英语"
     echo "  $0 --olang ja video.mp4              # 翻译为日语"
     echo "  $0 --olang zh -p \"技术教程\" video.mp4  # 翻译为中文并添加提示"
+    echo "  $0 -t video.mp4                      # 精简载荷模式，节省约一半token"
 }
 
 # 初始化变量
 INPUT_VIDEO=""
 OUTPUT_LANGUAGE="zh"
 CUSTOM_PROMPT=""
+TEXT_ONLY=false
 
 # 解析参数
 while [[ $# -gt 0 ]]; do
@@ -50,6 +53,10 @@ while [[ $# -gt 0 ]]; do
             CUSTOM_PROMPT="$2"
             shift 2
             ;;
+        -t|--text-only)
+            TEXT_ONLY=true
+            shift
+            ;;
         -h|--help)
             show_help
             exit 0
@@ -88,6 +95,7 @@ if ! command -v claude &> /dev/null; then
     exit 1
 fi
 
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 BASENAME=$(basename "${INPUT_VIDEO%.*}")
 TEMP_DIR="${BASENAME}_temp"
 INPUT_SRT="$TEMP_DIR/step2_whisper.srt"
@@ -136,8 +144,117 @@ echo "=================================================="
 INPUT_LINES=$(wc -l < "$INPUT_SRT")
 echo "字幕文件行数: $INPUT_LINES 行"
 
-# 根据行数选择处理方式（25条字幕 = 100行）
-if [ "$INPUT_LINES" -gt 100 ]; then
+# 精简载荷模式，或根据行数选择处理方式（25条字幕 = 100行）
+if [ "$TEXT_ONLY" = true ]; then
+    echo "📄 精简载荷模式：只发送编号字幕文本（每批25条），序号和时间轴在本地还原"
+    echo "=================================================="
+    
+    # 创建临时翻译目录，生成“序号|原文”载荷
+    TRANSLATE_TEMP_DIR="$TEMP_DIR/translate_text_temp"
+    mkdir -p "$TRANSLATE_TEMP_DIR"
+    TOTAL_BATCHES=$(python3 "$SCRIPT_DIR/srt_payload.py" split "$INPUT_SRT" "$TRANSLATE_TEMP_DIR")
+    echo "字幕分为 $TOTAL_BATCHES 批"
+    
+    BATCH_PROMPT="请将以下编号字幕逐条翻译为${LANGUAGE_NAME}。每行格式为“序号|原文”，请按相同格式逐行输出“序号|译文”，序号和条数保持不变，每条只占一行。只输出翻译结果，不要添加解释，不要出现引号、“。”，使用清晰简洁的口语表达："
+    if [ -n "$CUSTOM_PROMPT" ]; then
+        BATCH_PROMPT="$BATCH_PROMPT $CUSTOM_PROMPT"
+    fi
+    
+    SUCCESS_BATCHES=0
+    FAILED_BATCHES=()
+    SKIPPED_BATCHES=0
+    
+    for batch_num in $(seq 1 $TOTAL_BATCHES); do
+        BATCH_ID=$(printf "%03d" $batch_num)
+        PAYLOAD_FILE="$TRANSLATE_TEMP_DIR/payload_${BATCH_ID}.txt"
+        RESPONSE_FILE="$TRANSLATE_TEMP_DIR/response_${BATCH_ID}.txt"
+        
+        # 检查批次是否已经翻译过（条数一致才算完成）
+        if [ -s "$RESPONSE_FILE" ] && python3 "$SCRIPT_DIR/srt_payload.py" check "$PAYLOAD_FILE" "$RESPONSE_FILE" > /dev/null; then
+            echo "📝 批次 $batch_num/$TOTAL_BATCHES - ⏭️  已完成，跳过"
+            SUCCESS_BATCHES=$((SUCCESS_BATCHES + 1))
+            SKIPPED_BATCHES=$((SKIPPED_BATCHES + 1))
+            continue
+        fi
+        
+        echo "📝 翻译批次 $batch_num/$TOTAL_BATCHES..."
+        
+        # 重试机制：时间轴不再经过模型，只需校验条数
+        MAX_RETRIES=3
+        RETRY_COUNT=0
+        BATCH_SUCCESS=false
+        FAILURE_REASONS=()
+        
+        while [ $RETRY_COUNT -lt $MAX_RETRIES ] && [ "$BATCH_SUCCESS" = false ]; do
+            TEMP_BATCH_RESULT=$(mktemp)
+            TEMP_ERROR_LOG=$(mktemp)
+            FAILURE_REASON=""
+            
+            if claude --model claude-sonnet-4-20250514 "$BATCH_PROMPT" < "$PAYLOAD_FILE" > "$TEMP_BATCH_RESULT" 2>"$TEMP_ERROR_LOG"; then
+                if FAILURE_REASON=$(python3 "$SCRIPT_DIR/srt_payload.py" check "$PAYLOAD_FILE" "$TEMP_BATCH_RESULT"); then
+                    mv "$TEMP_BATCH_RESULT" "$RESPONSE_FILE"
+                    echo "    ✅ 批次 $batch_num 翻译成功"
+                    SUCCESS_BATCHES=$((SUCCESS_BATCHES + 1))
+                    BATCH_SUCCESS=true
+                fi
+            elif [ -s "$TEMP_ERROR_LOG" ]; then
+                FAILURE_REASON="Claude命令错误: $(head -1 "$TEMP_ERROR_LOG")"
+            else
+                FAILURE_REASON="Claude命令执行失败"
+            fi
+            
+            rm -f "$TEMP_BATCH_RESULT" "$TEMP_ERROR_LOG"
+            
+            if [ "$BATCH_SUCCESS" = false ]; then
+                RETRY_COUNT=$((RETRY_COUNT + 1))
+                FAILURE_REASONS+=("第${RETRY_COUNT}次: $FAILURE_REASON")
+                
+                if [ $RETRY_COUNT -lt $MAX_RETRIES ]; then
+                    echo "    ⚠️  批次 $batch_num 第 $RETRY_COUNT 次尝试失败: $FAILURE_REASON"
+                    echo "    🔄 等待2秒后重试..."
+                    sleep 2
+                fi
+            fi
+        done
+        
+        if [ "$BATCH_SUCCESS" = false ]; then
+            echo "    ❌ 批次 $batch_num 翻译失败（已重试 $MAX_RETRIES 次）"
+            echo "    失败原因:"
+            for reason in "${FAILURE_REASONS[@]}"; do
+                echo "      - $reason"
+            done
+            FAILED_BATCHES+=($batch_num)
+        fi
+        
+        # 显示进度
+        PROGRESS=$((batch_num * 100 / TOTAL_BATCHES))
+        echo "    📊 进度: $PROGRESS% ($batch_num/$TOTAL_BATCHES)"
+        echo ""
+    done
+    
+    echo "=================================================="
+    echo "📊 翻译统计:"
+    echo "  总批次数: $TOTAL_BATCHES"
+    echo "  成功批次: $SUCCESS_BATCHES"
+    echo "  跳过批次: $SKIPPED_BATCHES (断点继续)"
+    echo "  失败批次: $((TOTAL_BATCHES - SUCCESS_BATCHES))"
+    
+    if [ ${#FAILED_BATCHES[@]} -gt 0 ]; then
+        echo "  失败批次号: ${FAILED_BATCHES[*]}"
+        echo ""
+        echo "❌ 部分批次翻译失败，脚本退出"
+        echo "重新运行将只翻译失败的批次"
+        exit 1
+    fi
+    
+    # 用原文的序号和时间轴还原SRT，并报告载荷压缩情况
+    echo "🔗 还原SRT结构..."
+    if ! python3 "$SCRIPT_DIR/srt_payload.py" restore "$INPUT_SRT" "$TRANSLATE_TEMP_DIR" "$OUTPUT_SRT"; then
+        echo "❌ SRT还原失败"
+        exit 1
+    fi
+    
+elif [ "$INPUT_LINES" -gt 100 ]; then
     echo "📄 文件较大（>100行），使用分批翻译模式（每批25条字幕/100行）"
     echo "=================================================="
     
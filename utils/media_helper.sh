@@ -0,0 +1,21 @@
+#!/bin/bash
+# 媒体文件辅助函数
+# 用于判断下载或合并得到的音视频文件是否完整
+
+# 用ffprobe快速校验容器完整性（能读出有效时长才算下载完成）
+verify_media() {
+    local file="$1"
+    
+    if [ ! -f "$file" ] || [ ! -s "$file" ]; then
+        return 1
+    fi
+    
+    # 没有ffprobe时退化为大小检查
+    if ! command -v ffprobe &> /dev/null; then
+        return 0
+    fi
+    
+    local duration
+    duration=$(ffprobe -v error -show_entries format=duration -of default=noprint_wrappers=1:nokey=1 "$file" 2>/dev/null | head -1)
+    [[ "$duration" =~ ^[0-9]+(\.[0-9]+)?$ ]] && awk -v d="$duration" 'BEGIN { exit !(d > 0) }'
+}
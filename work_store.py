@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+临时目录的紧凑存储：TTS片段统一写入一个带索引、可内存映射的int16容器，
+长期保留的音轨使用FLAC无损压缩，并按策略延迟清理中间文件、统计每次运行的占用和写入量
+使用方法:
+  python3 work_store.py snapshot video_temp/                 # 运行开始时记录目录状态
+  python3 work_store.py cleanup video_temp/ --policy lazy    # 按策略清理中间文件
+  python3 work_store.py report video_temp/                   # 输出占用和本次写入量
+"""
+
+import json
+import wave
+import argparse
+import subprocess
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+MIX_RATE = 44100
+MIX_CHANNELS = 2
+DATA_FILE = 'segments.pcm'
+INDEX_FILE = 'segments.idx'
+STATS_FILE = '.run_stats.json'
+CLEANUP_POLICIES = ('keep', 'lazy', 'eager')
+
+# 追加写入的文件只统计本次增长的部分
+APPEND_ONLY = {DATA_FILE, INDEX_FILE}
+
+# lazy: 已写入容器或已合成进音轨的中间文件，以及旧版本遗留的逐片段文件
+LAZY_PATTERNS = ['segment_*.wav', 'segment_*.txt', 'silence_base.wav', 'batch_*_audio.wav',
+                 'test_*.wav', 'test_*.flac', '*.pcm.part', '*.part.flac']
+# eager: 最终视频生成后，可由配音和原视频快速重建的中间音视频
+EAGER_PATTERNS = ['background_audio.*', 'mixed_audio.*', 'step6_with_audio.mp4']
+
+
+def read_wav_int16(wav_path: Path) -> Tuple[bytes, int, int]:
+    """读取16位PCM的WAV，其他格式用ffmpeg转换为混音格式"""
+    try:
+        with wave.open(str(wav_path), 'rb') as wav:
+            if wav.getsampwidth() == 2:
+                return wav.readframes(wav.getnframes()), wav.getframerate(), wav.getnchannels()
+    except (wave.Error, EOFError):
+        pass
+
+    result = subprocess.run(['ffmpeg', '-v', 'error', '-i', str(wav_path), '-f', 's16le',
+                             '-ar', str(MIX_RATE), '-ac', str(MIX_CHANNELS), '-'], capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"无法读取音频 {wav_path}: {result.stderr.decode(errors='replace').strip()}")
+    return result.stdout, MIX_RATE, MIX_CHANNELS
+
+
+class SegmentStore:
+    """TTS片段容器：所有片段的int16 PCM顺序追加到一个数据文件，索引按行追加记录偏移"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.data_path = self.directory / DATA_FILE
+        self.index_path = self.directory / INDEX_FILE
+        self.entries: Dict[str, Dict] = {}
+        self.bytes_written = 0
+        self.lock = threading.Lock()
+        self._load_index()
+
+    def _load_index(self):
+        if not self.index_path.exists():
+            return
+        data_size = self.data_path.stat().st_size if self.data_path.exists() else 0
+        for line in self.index_path.read_text(encoding='utf-8').splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # 中断时写了一半的索引行
+            # 同一片段重新生成时，后写入的记录生效
+            if entry['offset'] + entry['frames'] * entry['channels'] * 2 <= data_size:
+                self.entries[entry['key']] = entry
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def has(self, key: str, text: Optional[str] = None) -> bool:
+        entry = self.entries.get(key)
+        return entry is not None and (text is None or entry.get('text') == text)
+
+    def duration(self, key: str) -> float:
+        entry = self.entries[key]
+        return entry['frames'] / entry['rate']
+
+    def add_wav(self, key: str, wav_path: Path, text: str = '') -> Dict:
+        """把一个WAV片段写入容器，返回索引记录"""
+        pcm, rate, channels = read_wav_int16(Path(wav_path))
+        with self.lock:
+            with open(self.data_path, 'ab') as data:
+                offset = data.tell()
+                data.write(pcm)
+            entry = {'key': key, 'offset': offset, 'frames': len(pcm) // (2 * channels),
+                     'rate': rate, 'channels': channels, 'text': text}
+            line = json.dumps(entry, ensure_ascii=False) + '\n'
+            with open(self.index_path, 'a', encoding='utf-8') as index:
+                index.write(line)
+            self.entries[key] = entry
+            self.bytes_written += len(pcm) + len(line.encode('utf-8'))
+        return entry
+
+    def samples(self, key: str) -> np.ndarray:
+        """以内存映射方式返回片段，形状为 (帧数, 声道数)"""
+        entry = self.entries[key]
+        if entry['frames'] == 0:
+            return np.zeros((0, entry['channels']), dtype='<i2')
+        return np.memmap(self.data_path, dtype='<i2', mode='r', offset=entry['offset'],
+                         shape=(entry['frames'], entry['channels']))
+
+    def render(self, key: str, speed: float = 1.0) -> np.ndarray:
+        """把片段转换为混音格式（44.1kHz立体声），按需调整语速，不落盘
+        语速调整失败时与原来逐句处理一样，该片段使用原速音频"""
+        entry = self.entries[key]
+        result = self._convert(entry, self.samples(key), atempo_filter(speed))
+        if result.returncode != 0 and speed != 1.0:
+            print(f"   语速调整失败，使用原速音频: {key} {result.stderr.decode(errors='replace').strip() or '未知错误'}")
+            result = self._convert(entry, self.samples(key), 'anull')
+        if result.returncode != 0:
+            raise RuntimeError(f"片段 {key} 转换失败: {result.stderr.decode(errors='replace').strip()}")
+        return np.frombuffer(result.stdout, dtype='<i2').reshape(-1, MIX_CHANNELS)
+
+    @staticmethod
+    def _convert(entry: dict, samples: np.ndarray, audio_filter: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            ['ffmpeg', '-v', 'error', '-f', 's16le', '-ar', str(entry['rate']), '-ac', str(entry['channels']),
+             '-i', '-', '-filter:a', audio_filter, '-f', 's16le', '-ar', str(MIX_RATE), '-ac', str(MIX_CHANNELS), '-'],
+            input=samples.tobytes(), capture_output=True)
+
+
+def atempo_filter(speed: float) -> str:
+    """生成语速调整滤镜；单个atempo在较旧的ffmpeg中只支持0.5~2.0倍，超出范围时串联多个"""
+    if speed <= 0:
+        raise ValueError(f"语速倍数必须大于0: {speed}")
+    if speed == 1.0:
+        return 'anull'
+    factors = []
+    while speed > 2.0:
+        factors.append(2.0)
+        speed /= 2.0
+    while speed < 0.5:
+        factors.append(0.5)
+        speed /= 0.5
+    factors.append(speed)
+    return ','.join(f'atempo={factor:.6g}' for factor in factors)
+
+
+def overlay(track: np.ndarray, pcm: np.ndarray, start: float):
+    """把片段叠加到音轨的指定位置，超出范围的部分限幅"""
+    # 与adelay一致，延迟按整毫秒计算
+    begin = int(start * 1000) * MIX_RATE // 1000
+    end = min(begin + len(pcm), len(track))
+    if end <= begin:
+        return
+    mixed = track[begin:end].astype(np.int32) + pcm[:end - begin]
+    np.clip(mixed, -32768, 32767, out=mixed)
+    track[begin:end] = mixed
+
+
+def render_voice_track(store: SegmentStore, placements: List[Tuple[str, float]], duration: float,
+                       output: Path, speed: float = 1.0, jobs: int = 1) -> int:
+    """按起始时间把片段叠加到整条音轨并编码为FLAC，等价于静音底轨上 adelay + amix(normalize=0)
+    片段的格式转换和语速调整由 jobs 个线程并行执行，叠加仍按顺序进行
+    返回混音用临时PCM的字节数（编码后已删除）"""
+    output = Path(output)
+    scratch = output.with_name(output.name + '.pcm.part')
+    total_frames = max(int(duration * MIX_RATE), 1)
+    track = np.memmap(scratch, dtype='<i2', mode='w+', shape=(total_frames, MIX_CHANNELS))
+
+    jobs = max(jobs, 1)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+        for key, start in placements:
+            pending.append((executor.submit(store.render, key, speed), start))
+            # 最多提前转换 2*jobs 个片段，限制内存占用
+            if len(pending) > 2 * jobs:
+                future, begin = pending.popleft()
+                overlay(track, future.result(), begin)
+        while pending:
+            future, begin = pending.popleft()
+            overlay(track, future.result(), begin)
+    track.flush()
+    del track
+
+    encoding = output.with_name(output.stem + '.part' + output.suffix)
+    result = subprocess.run(['ffmpeg', '-v', 'error', '-f', 's16le', '-ar', str(MIX_RATE), '-ac', str(MIX_CHANNELS),
+                             '-i', str(scratch), '-c:a', 'flac', str(encoding), '-y'], capture_output=True)
+    scratch_bytes = scratch.stat().st_size
+    scratch.unlink()
+    if result.returncode != 0:
+        encoding.unlink(missing_ok=True)
+        raise RuntimeError(f"FLAC编码失败: {result.stderr.decode(errors='replace').strip()}")
+    encoding.replace(output)
+    return scratch_bytes
+
+
+def cleanup(temp_dir: Path, policy: str) -> List[Path]:
+    """按策略删除中间文件，返回删除的文件列表
+    keep: 全部保留；lazy: 删除已进入容器或已合成的中间文件；eager: 另外删除可快速重建的中间音视频"""
+    if policy not in CLEANUP_POLICIES:
+        raise ValueError(f"未知的清理策略: {policy}")
+    if policy == 'keep':
+        return []
+
+    temp_dir = Path(temp_dir)
+    store = SegmentStore(temp_dir)
+    patterns = LAZY_PATTERNS + (EAGER_PATTERNS if policy == 'eager' else [])
+    removed = []
+    for pattern in patterns:
+        for path in sorted(temp_dir.glob(pattern)):
+            # 逐片段的原始TTS音频只有进入容器后才删除，避免丢失需要GPU重新生成的结果
+            if pattern == 'segment_*.wav' and not path.stem.endswith('_speed') and not store.has(path.stem):
+                continue
+            path.unlink()
+            removed.append(path)
+    return removed
+
+
+def scan(temp_dir: Path) -> Dict[str, Tuple[int, int]]:
+    return {str(path.relative_to(temp_dir)): (path.stat().st_size, path.stat().st_mtime_ns)
+            for path in Path(temp_dir).rglob('*') if path.is_file() and path.name != STATS_FILE}
+
+
+def snapshot(temp_dir: Path):
+    """记录运行开始时的目录状态，用于统计本次运行的写入量"""
+    stats = {'files': scan(temp_dir), 'transient': 0}
+    (Path(temp_dir) / STATS_FILE).write_text(json.dumps(stats), encoding='utf-8')
+
+
+def record_writes(temp_dir: Path, nbytes: int):
+    """记录运行中写入后又被删除的字节数（临时PCM、已入库的TTS片段等）"""
+    stats_path = Path(temp_dir) / STATS_FILE
+    if not stats_path.exists():
+        return
+    stats = json.loads(stats_path.read_text(encoding='utf-8'))
+    stats['transient'] += nbytes
+    stats_path.write_text(json.dumps(stats), encoding='utf-8')
+
+
+def category(name: str) -> str:
+    if name in APPEND_ONLY:
+        return 'TTS片段容器'
+    suffix = Path(name).suffix.lower()
+    if suffix in ('.wav', '.pcm', '.part'):
+        return '未压缩音频'
+    if suffix == '.flac':
+        return 'FLAC音轨'
+    if suffix in ('.mp4', '.webm', '.mkv', '.mov'):
+        return '视频'
+    return '字幕和其他'
+
+
+def format_size(nbytes: int) -> str:
+    return f"{nbytes / 1024 / 1024:.1f} MB"
+
+
+def report(temp_dir: Path) -> str:
+    """汇总临时目录占用（按类别）和本次运行的写入量"""
+    temp_dir = Path(temp_dir)
+    files = scan(temp_dir)
+    groups: Dict[str, List[int]] = {}
+    for name, (size, _) in files.items():
+        group = groups.setdefault(category(Path(name).name), [0, 0])
+        group[0] += 1
+        group[1] += size
+
+    total = sum(size for size, _ in files.values())
+    lines = [f"📦 临时目录占用: {format_size(total)} ({len(files)} 个文件)"]
+    for name, (count, size) in sorted(groups.items(), key=lambda item: -item[1][1]):
+        lines.append(f"   {name}: {format_size(size)} ({count} 个文件)")
+
+    stats_path = temp_dir / STATS_FILE
+    if stats_path.exists():
+        stats = json.loads(stats_path.read_text(encoding='utf-8'))
+        before = stats['files']
+        written = stats['transient']
+        for name, (size, mtime) in files.items():
+            old = before.get(name)
+            if old is None or tuple(old) != (size, mtime):
+                grown = Path(name).name in APPEND_ONLY and old is not None and size >= old[0]
+                written += size - old[0] if grown else size
+        lines.append(f"✍️  本次运行写入: {format_size(written)}"
+                     f"（其中已删除的中间文件 {format_size(stats['transient'])}）")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='临时目录紧凑存储工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    snapshot_parser = subparsers.add_parser('snapshot', help='记录运行开始时的目录状态')
+    snapshot_parser.add_argument('temp_dir', help='临时目录')
+
+    cleanup_parser = subparsers.add_parser('cleanup', help='按策略清理中间文件')
+    cleanup_parser.add_argument('temp_dir', help='临时目录')
+    cleanup_parser.add_argument('--policy', choices=CLEANUP_POLICIES, default='lazy',
+                                help='清理策略 (默认: lazy)')
+
+    report_parser = subparsers.add_parser('report', help='输出占用和本次运行写入量')
+    report_parser.add_argument('temp_dir', help='临时目录')
+
+    args = parser.parse_args()
+    temp_dir = Path(args.temp_dir)
+
+    if args.command == 'snapshot':
+        snapshot(temp_dir)
+    elif args.command == 'cleanup':
+        removed = cleanup(temp_dir, args.policy)
+        print(f"🧹 清理策略 {args.policy}: 删除 {len(removed)} 个中间文件")
+    else:
+        print(report(temp_dir))
+
+
+if __name__ == "__main__":
+    main()